@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+LOOM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'loom')
+sys.path.insert(0, os.path.abspath(LOOM_PATH))
+
+from loomtoken import tokenize
+from loomparse import parse
+from loomast import typecheck_ast
+from loomopt import FOLD_LIMIT, fold_constants
+from loomgen import BACKENDS, generate_program
+from loomcache import compiler_version
+
+def name(index):
+    letters = ''
+    while True:
+        index, letter = divmod(index, 26)
+        letters += chr(ord('a') + letter)
+        if not index:
+            return 'l_' + letters
+
+def statements_program(size):
+    lines = ['bits := {0, 1}', f'{name(0)} := bits']
+    for index in range(1, size):
+        operator = ['∪', '×', '∩', '-'][index % 4]
+        lines.append(f'{name(index)} := ({name(index - 1)} {operator} bits)*')
+    return '\n'.join(lines) + '\n'
+
+def nesting_program(size):
+    expression = '{0}'
+    for index in range(size):
+        expression = f'({expression} {["∪", "×"][index % 2]} {{1}})'
+    return f'deep := {expression}\n'
+
+def concatenation_program(size):
+    return 'bits := {0, 1}\n' \
+        f'long := {" + ".join("01"[index % 2] for index in range(size))} ∈ bits*\n' \
+        'long !\n'
+
+def width_program(size):
+    width = max(1, (size - 1).bit_length())
+    return f'wide := {{{", ".join(format(index, "b").zfill(width) for index in range(size))}}}\n'
+
+SHAPES = {
+    'statements' : statements_program,
+    'nesting' : nesting_program,
+    'concatenation' : concatenation_program,
+    'width' : width_program,
+}
+
+def stages(source, backend, fold_limit):
+    tokens = yield 'tokenize', lambda: list(tokenize(source))
+    tree = yield 'parse', lambda: parse(tokens)
+    yield 'typecheck', lambda: typecheck_ast(tree)
+    tree = yield 'fold', lambda: fold_constants(tree, fold_limit)
+    yield 'generate', lambda: generate_program(tree, backend)
+
+def measure(source, backend, fold_limit, repeat):
+    results = []
+    pipeline = stages(source, backend, fold_limit)
+    label, stage = next(pipeline)
+    while True:
+        seconds = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            value = stage()
+            seconds = min(seconds or float('inf'), time.perf_counter() - started)
+        tracemalloc.start()
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({ 'stage' : label, 'seconds' : seconds, 'peak_bytes' : peak })
+        try:
+            label, stage = pipeline.send(value)
+        except StopIteration:
+            return results
+
+def run(shapes, sizes, backend, fold_limit, repeat):
+    runs = []
+    for shape in shapes:
+        for size in sizes:
+            source = SHAPES[shape](size)
+            result = { 'shape' : shape, 'size' : size, 'source_bytes' : len(source.encode()) }
+            result['stages'] = measure(source, backend, fold_limit, repeat)
+            runs.append(result)
+            print(f'{shape} {size}: ' + ', '.join(f'{stage["stage"]} {stage["seconds"]:.4f}s' for stage in result['stages']),
+                  file=sys.stderr)
+    return runs
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and measure every stage of the Loom compile pipeline')
+    parser.add_argument('--shapes',
+                        nargs='+',
+                        choices=sorted(SHAPES),
+                        default=sorted(SHAPES),
+                        help='Synthetic program shapes to benchmark')
+    parser.add_argument('--sizes',
+                        nargs='+',
+                        type=int,
+                        default=[10, 100, 1000],
+                        help='Statement count, nesting depth, chain length or set width of each program')
+    parser.add_argument('--backend',
+                        choices=sorted(BACKENDS),
+                        default='lambda',
+                        help='Backend used by the generate stage')
+    parser.add_argument('--fold-limit',
+                        type=int,
+                        default=FOLD_LIMIT,
+                        help='Fold limit used by the fold stage')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='Runs per stage, the fastest of which is reported')
+    parser.add_argument('-o',
+                        metavar='output',
+                        type=str,
+                        dest='output',
+                        help='Output JSON file (default: stdout)')
+    arguments = parser.parse_args()
+    report = {
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'compiler' : compiler_version(),
+        'backend' : arguments.backend,
+        'fold_limit' : arguments.fold_limit,
+        'repeat' : arguments.repeat,
+        'runs' : run(arguments.shapes, arguments.sizes, arguments.backend, arguments.fold_limit, arguments.repeat),
+    }
+    if arguments.output:
+        with open(arguments.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+LOOM_PATH = os.path.dirname(os.path.abspath(__file__))
+if LOOM_PATH not in sys.path:
+    sys.path.append(LOOM_PATH)
+
+from loomlib import Environment, Language, compile
@@ -2,11 +2,21 @@
 
 import argparse
 import sys
+import time
 
 from loomtoken import tokenize
 from loomparse import parse
 from loomast import print_ast, typecheck_ast
-from loomgen import generate_program
+from loomopt import FOLD_LIMIT, fold_constants
+from loomgen import BACKENDS, generate_program
+from loomfilter import compile_language, filter_lines
+from loomcache import Cache
+from loomserve import serve
+from loomtrace import ChromeTrace, add_hook, count_nodes, span, tracing
+from loomwatch import IncrementalCompiler, watch
+import loomtrace
+
+FILTER_BUFFER_SIZE = 1 << 20
 
 def parse_arguments():
     description = 'Loom is a programming language by Murray Steele'
@@ -23,25 +33,218 @@ def parse_arguments():
                         metavar='output',
                         type=str,
                         dest='output',
-                        help='Output python file')
+                        help='Output python file, or output file for filtered strings')
+    parser.add_argument('--backend',
+                        choices=sorted(BACKENDS),
+                        default='lambda',
+                        help='Set expression backend used by the generated program')
+    parser.add_argument('--packed',
+                        action='store_true',
+                        default=False,
+                        help='Represent strings in the generated program as (value, length) integer pairs')
+    parser.add_argument('--stream',
+                        action='store_true',
+                        default=False,
+                        help='Match inquired input in chunks while reading it when its language is compiled to an automaton')
+    parser.add_argument('--fold-limit',
+                        metavar='limit',
+                        type=int,
+                        default=FOLD_LIMIT,
+                        help=f'Largest finite language folded into a single set literal (default: {FOLD_LIMIT}, 0 disables folding)')
+    parser.add_argument('--filter',
+                        metavar='language',
+                        type=str,
+                        help='Print the lines of the input that are in the given language')
+    parser.add_argument('--input',
+                        metavar='input',
+                        type=str,
+                        help='Input file of newline separated strings to filter (default: stdin)')
+    parser.add_argument('--annotate',
+                        action='store_true',
+                        default=False,
+                        help='Print every filtered line followed by a 1 or 0 membership column')
+    parser.add_argument('--jobs',
+                        metavar='jobs',
+                        type=int,
+                        default=1,
+                        help='Number of worker processes used by --filter (default: 1)')
+    parser.add_argument('--enumerate',
+                        metavar='language',
+                        type=str,
+                        help='Print the strings of the given language in length-lexicographic order')
+    parser.add_argument('--max-length',
+                        metavar='length',
+                        type=int,
+                        help='Longest string printed by --enumerate (default: unbounded)')
+    parser.add_argument('--count',
+                        metavar='language',
+                        type=str,
+                        help='Print the number of strings of --length bits in the given language')
+    parser.add_argument('--length',
+                        metavar='length',
+                        type=int,
+                        help='String length counted by --count')
+    parser.add_argument('--range',
+                        action='store_true',
+                        default=False,
+                        help='Print the counts for every length up to --length')
+    parser.add_argument('--serve',
+                        metavar='address',
+                        type=str,
+                        help='Answer "LANGUAGE BITS" membership queries on HOST:PORT or unix:PATH')
+    parser.add_argument('--trace',
+                        metavar='trace',
+                        type=str,
+                        help='Write a Chrome trace of the compile stages to the given JSON file')
+    parser.add_argument('--trace-statements',
+                        action='store_true',
+                        default=False,
+                        help='Also trace code generation of every top-level statement')
+    parser.add_argument('--watch',
+                        action='store_true',
+                        default=False,
+                        help='Recompile whenever the source file changes, rebuilding only the statements affected by the edit')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        default=False,
+                        help='Always compile, without reading or writing the compile cache')
     args = parser.parse_args()
+    if args.count and args.length is None:
+        parser.error('--count requires --length')
+    for name in ['length', 'max_length']:
+        if getattr(args, name) is not None and getattr(args, name) < 0:
+            parser.error(f'--{name.replace("_", "-")} must not be negative')
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
     return vars(args)
 
+def run_filter(tree, arguments):
+    dfa = compile_language(tree, arguments['filter'])
+    source = open(arguments['input'], buffering=FILTER_BUFFER_SIZE) if arguments['input'] else sys.stdin
+    output = open(arguments['output'], 'w', buffering=FILTER_BUFFER_SIZE) if arguments['output'] else sys.stdout
+    try:
+        filter_lines(dfa, source, output, arguments['annotate'], arguments['jobs'])
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+def run_enumerate(tree, arguments):
+    dfa = compile_language(tree, arguments['enumerate'])
+    for bits in dfa.strings(arguments['max_length']):
+        print(bits)
+
+def run_count(tree, arguments):
+    dfa = compile_language(tree, arguments['count'])
+    if arguments['range']:
+        for length, count in enumerate(dfa.counts(arguments['length'])):
+            print(f'{length}\t{count}')
+    else:
+        print(dfa.count(arguments['length']))
+
+def read_program(source_file):
+    with open(source_file, 'rb') as source:
+        return parse_source(source)
+
+def parse_source(source):
+    if not tracing():
+        return parse(tokenize(source))
+    with span('tokenize') as trace:
+        tokens = list(tokenize(source))
+        trace['tokens'] = len(tokens)
+    with span('parse') as trace:
+        tree = parse(tokens)
+        trace['statements'] = len(tree.statements)
+        trace['nodes'] = count_nodes(tree)
+    return tree
+
+def check_program(tree):
+    with span('typecheck'):
+        typecheck_ast(tree)
+
+def compile_program(source, options):
+    tree = parse_source(source)
+    check_program(tree)
+    with span('fold') as trace:
+        tree = fold_constants(tree, options['fold_limit'])
+        trace['nodes'] = count_nodes(tree) if tracing() else None
+    with span('generate', backend=options['backend']) as trace:
+        program = generate_program(tree, options['backend'], options['packed'], options['stream'])
+        trace['lines'] = program.count('\n') + 1
+    return program
+
 def main():
     arguments = parse_arguments()
-    with open(arguments['source_file']) as source:
-        tokens = list(tokenize(source.read()))
-        tree = parse(tokens)
+    if arguments['trace']:
+        trace = ChromeTrace()
+        add_hook(trace)
+        loomtrace.detailed = arguments['trace_statements']
+    try:
+        run(arguments)
+    finally:
+        if arguments['trace']:
+            trace.write(arguments['trace'])
+
+def run(arguments):
+    if arguments['ast'] or arguments['filter'] or arguments['enumerate'] or arguments['count'] or arguments['serve']:
+        tree = read_program(arguments['source_file'])
         if arguments['ast']:
             print_ast(tree)
+        elif arguments['filter']:
+            check_program(tree)
+            run_filter(tree, arguments)
+        elif arguments['enumerate']:
+            check_program(tree)
+            run_enumerate(tree, arguments)
+        elif arguments['serve']:
+            check_program(tree)
+            serve(tree, arguments['serve'])
+        else:
+            check_program(tree)
+            run_count(tree, arguments)
+        return
+    options = { name : arguments[name] for name in ('backend', 'packed', 'stream', 'fold_limit') }
+    if arguments['watch']:
+        run_watch(arguments, options)
+        return
+    with open(arguments['source_file'], 'rb') as source:
+        if arguments['no_cache']:
+            program = compile_program(source, options)
         else:
-            typecheck_ast(tree)
-            program = generate_program(tree)
-            if arguments['output']:
-                with open(arguments['output'], 'w') as output:
-                    output.write(program)
-            else:
-                print(program)
+            cache = Cache()
+            with span('cache') as trace:
+                key = cache.key(source, options)
+                program = cache.get(key)
+                trace['hit'] = program is not None
+            if program is None:
+                source.seek(0)
+                program = compile_program(source, options)
+                cache.put(key, program)
+    write_program(program, arguments['output'])
+
+def run_watch(arguments, options):
+    compiler = IncrementalCompiler(**options)
+    try:
+        for source in watch(arguments['source_file']):
+            started = time.perf_counter()
+            try:
+                program = compiler.compile(source)
+            except RuntimeError as error:
+                print(f'Error: {error}', file=sys.stderr)
+                continue
+            write_program(program, arguments['output'])
+            print(f'Rebuilt {compiler.rebuilt} of {compiler.statements} statements '
+                  f'in {(time.perf_counter() - started) * 1e3:.1f} ms', file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+def write_program(program, path):
+    if path:
+        with open(path, 'w') as output:
+            output.write(program)
+    else:
+        print(program)
 
 
 
@@ -3,8 +3,34 @@
 import abc
 from collections import defaultdict
 import enum
+import types
 
 class AST(abc.ABC):
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        pairs = [ (self, other) ]
+        while pairs:
+            left, right = pairs.pop()
+            if left is right:
+                continue
+            if type(left) != type(right):
+                return False
+            if isinstance(left, AST):
+                if left.hash != right.hash:
+                    return False
+                pairs.extend((getattr(left, name), getattr(right, name)) for name in type(left).__slots__)
+            elif isinstance(left, list):
+                if len(left) != len(right):
+                    return False
+                pairs.extend(zip(left, right))
+            elif left != right:
+                return False
+        return True
+
+    def __hash__(self):
+        return self.hash
     
     @abc.abstractmethod
     def accept(self, visitor):
@@ -12,300 +38,327 @@ class AST(abc.ABC):
 
 class Program(AST):
     
+    __slots__ = ('statements', 'hash')
+
     def __init__(self, statements):
         self.statements = statements
-
-    def __eq__(self, other):
-        return self.statements == other.statements
+        self.hash = hash((Program, tuple(statements)))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class LanguageDefinition(AST):
 
+    __slots__ = ('symbol', 'expression', 'hash')
+
     def __init__(self, symbol, expression):
         self.symbol = symbol
         self.expression = expression
+        self.hash = hash((LanguageDefinition, symbol, expression))
 
-    def __eq__(self, other):
-        return self.symbol == other.symbol \
-            and self.expression == other.expression
-    
     def accept(self, visitor):
         return visitor.visit(self)
 
 class StringDefinition(AST):
     
+    __slots__ = ('symbol', 'string_expression', 'set_expression', 'hash')
+
     def __init__(self, symbol, string_expression, set_expression):
         self.symbol = symbol
         self.string_expression = string_expression
         self.set_expression = set_expression
-
-    def __eq__(self, other):
-        return self.symbol == other.symbol  \
-            and self.string_expression == other.string_expression \
-            and self.set_expression == other.set_expression
+        self.hash = hash((StringDefinition, symbol, string_expression, set_expression))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class ExclaimStatement(AST):
 
+    __slots__ = ('expression', 'hash')
+
     def __init__(self, expression):
         self.expression = expression
-
-    def __eq__(self, other):
-        return self.expression == other.expression
+        self.hash = hash((ExclaimStatement, expression))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class InquireStatement(AST):
 
+    __slots__ = ('symbol', 'expression', 'hash')
+
     def __init__(self, symbol, expression):
         self.symbol = symbol
         self.expression = expression
-
-    def __eq__(self, other):
-        return self.symbol == other.symbol \
-            and self.expression == other.expression
+        self.hash = hash((InquireStatement, symbol, expression))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class UnionExpression(AST):
     
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return self.left == other.left \
-            and self.right == other.right
+        self.hash = hash((UnionExpression, left, right))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class IntersectExpression(AST):
     
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return self.left == other.left \
-            and self.right == other.right;
+        self.hash = hash((IntersectExpression, left, right))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class ProductExpression(AST):
     
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return self.left == other.left \
-            and self.right == other.right;
+        self.hash = hash((ProductExpression, left, right))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class DifferenceExpression(AST):
     
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return self.left == other.left \
-            and self.right == other.right;
+        self.hash = hash((DifferenceExpression, left, right))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class ComplementExpression(AST):
     
+    __slots__ = ('expression', 'hash')
+
     def __init__(self, expression):
         self.expression = expression
-
-    def __eq__(self, other):
-        return self.expression == other.expression
+        self.hash = hash((ComplementExpression, expression))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class KleeneExpression(AST):
 
+    __slots__ = ('expression', 'hash')
+
     def __init__(self, expression):
         self.expression = expression
-
-    def __eq__(self, other):
-        return self.expression == other.expression
+        self.hash = hash((KleeneExpression, expression))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class Set(AST):
     
+    __slots__ = ('expressions', 'hash')
+
     def __init__(self, expressions):
         self.expressions = expressions
-
-    def __eq__(self, other):
-        return self.expressions == other.expressions
+        self.hash = hash((Set, tuple(expressions)))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class Symbol(AST):
 
+    __slots__ = ('identifier', 'hash')
+
     def __init__(self, identifier):
         self.identifier = identifier
-
-    def __eq__(self, other):
-        return self.identifier == other.identifier
-
-    def __hash__(self):
-        return hash(self.identifier)
+        self.hash = hash((Symbol, identifier))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class ConcatenateExpression(AST):
 
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
         self.left = left
         self.right = right
-
-    def __eq__(self, other):
-        return self.left == other.left \
-            and self.right == other.right
+        self.hash = hash((ConcatenateExpression, left, right))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
 class String(AST):
 
+    __slots__ = ('bits', 'hash')
+
     def __init__(self, bits):
         self.bits = bits
-
-    def __eq__(self, other):
-        return self.bits == other.bits
+        self.hash = hash((String, bits))
 
     def accept(self, visitor):
         return visitor.visit(self)
 
-class ASTStringifier:
+VISIT_METHODS = {
+    Program : 'visit_program',
+    LanguageDefinition : 'visit_language_definition',
+    StringDefinition : 'visit_string_definition',
+    ExclaimStatement : 'visit_exclaim_statement',
+    InquireStatement : 'visit_inquire_statement',
+    UnionExpression : 'visit_union_expression',
+    IntersectExpression : 'visit_intersect_expression',
+    ProductExpression : 'visit_product_expression',
+    DifferenceExpression : 'visit_difference_expression',
+    ComplementExpression : 'visit_complement_expression',
+    KleeneExpression : 'visit_kleene_expression',
+    Set : 'visit_set',
+    Symbol : 'visit_symbol',
+    ConcatenateExpression : 'visit_concatenate_expression',
+    String : 'visit_string',
+}
+
+STATEMENTS = { Program, LanguageDefinition, StringDefinition, ExclaimStatement, InquireStatement }
+
+class Visitor:
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.methods = { node_type : getattr(cls, name) for node_type, name in VISIT_METHODS.items() if hasattr(cls, name) }
 
     def visit(self, node):
-        if type(node) == Program:
-            return self.visit_program(node)
-        elif type(node) == LanguageDefinition:
-            return self.visit_language_definition(node)
-        elif type(node) == StringDefinition:
-            return self.visit_string_definition(node)
-        elif type(node) == ExclaimStatement:
-            return self.visit_exclaim_statement(node)
-        elif type(node) == InquireStatement:
-            return self.visit_inquire_statement(node)
-        elif type(node) == UnionExpression:
-            return self.visit_union_expression(node)
-        elif type(node) == IntersectExpression:
-            return self.visit_intersect_expression(node)
-        elif type(node) == ProductExpression:
-            return self.visit_product_expression(node)
-        elif type(node) == DifferenceExpression:
-            return self.visit_difference_expression(node)
-        elif type(node) == ComplementExpression:
-            return self.visit_complement_expression(node)
-        elif type(node) == KleeneExpression:
-            return self.visit_kleene_expression(node)
-        elif type(node) == Set:
-            return self.visit_set(node)
+        stack = []
+        result = self.dispatch(node)
+        while True:
+            if isinstance(result, types.GeneratorType):
+                stack.append(result)
+                result = None
+            elif not stack:
+                return result
+            try:
+                child = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            result = self.dispatch(child)
+
+    def dispatch(self, node):
+        method = self.methods.get(type(node))
+        if method is None:
+            raise RuntimeError('Unknown node type')
+        return method(self, node)
+
+def remember(cache, node, result):
+    if isinstance(result, types.GeneratorType):
+        result = yield from result
+    cache[node] = result
+    return result
+
+def concatenation_operands(node):
+    operands = []
+    stack = [ node ]
+    while stack:
+        node = stack.pop()
+        if type(node) == ConcatenateExpression:
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            operands.append(node)
+    return operands
+
+def references(statement):
+    identifiers = set()
+    stack = [ getattr(statement, name) for name in type(statement).__slots__ if name not in ('symbol', 'hash') ]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
         elif type(node) == Symbol:
-            return self.visit_symbol(node)
-        elif type(node) == ConcatenateExpression:
-            return self.visit_concatenate_expression(node)
-        elif type(node) == String:
-            return self.visit_string(node)
-        raise RuntimeError('Unknown node type')
+            identifiers.add(node.identifier)
+        elif isinstance(node, AST):
+            stack.extend(getattr(node, name) for name in type(node).__slots__ if name != 'hash')
+    return identifiers
+
+class ASTStringifier(Visitor):
+
+    def visit(self, node):
+        self.parts = []
+        super().visit(node)
+        return ''.join(self.parts)
+
+    def write(self, label, *children):
+        self.parts.append(f'({label} : ')
+        for index, child in enumerate(children):
+            if index:
+                self.parts.append(', ')
+            yield child
+        self.parts.append(')')
 
     def visit_program(self, program):
-        return f'(PROGRAM : {", ".join([ s.accept(self) for s in program.statements ])})'
+        yield from self.write('PROGRAM', *program.statements)
 
     def visit_language_definition(self, language_definition):
-        return '(LANGUAGE-DEFINITION : ' \
-                f'{language_definition.symbol.accept(self)}, ' \
-                f'{language_definition.expression.accept(self)})'
+        yield from self.write('LANGUAGE-DEFINITION',
+                              language_definition.symbol,
+                              language_definition.expression)
 
     def visit_string_definition(self, string_definition):
-        return '(STRING-DEFINITION : ' \
-                f'{string_definition.symbol.accept(self)}, ' \
-                f'{string_definition.string_expression.accept(self)}, ' \
-                f'{string_definition.set_expression.accept(self)})'
+        yield from self.write('STRING-DEFINITION',
+                              string_definition.symbol,
+                              string_definition.string_expression,
+                              string_definition.set_expression)
  
     def visit_exclaim_statement(self, exclaim_statement):
-        return '(EXCLAIM-STATEMENT : ' \
-                f'{exclaim_statement.expression.accept(self)})'
+        yield from self.write('EXCLAIM-STATEMENT', exclaim_statement.expression)
 
     def visit_inquire_statement(self, inquire_statement):
-        return '(INQUIRE-STATEMENT : ' \
-                f'{inquire_statement.symbol.accept(self)}, ' \
-                f'{inquire_statement.expression.accept(self)})'
+        yield from self.write('INQUIRE-STATEMENT', inquire_statement.symbol, inquire_statement.expression)
 
     def visit_union_expression(self, union_expression):
-        return '(UNION-EXPRESSION : ' \
-                f'{union_expression.left.accept(self)}, ' \
-                f'{union_expression.right.accept(self)})'
+        yield from self.write('UNION-EXPRESSION', union_expression.left, union_expression.right)
 
     def visit_intersect_expression(self, intersect_expression):
-        return '(INTERSECT-EXPRESSION : ' \
-                f'{intersect_expression.left.accept(self)}, ' \
-                f'{intersect_expression.right.accept(self)})'
+        yield from self.write('INTERSECT-EXPRESSION', intersect_expression.left, intersect_expression.right)
 
     def visit_product_expression(self, product_expression):
-        return '(PRODUCT-EXPRESSION : ' \
-                f'{product_expression.left.accept(self)}, ' \
-                f'{product_expression.right.accept(self)})'
+        yield from self.write('PRODUCT-EXPRESSION', product_expression.left, product_expression.right)
 
     def visit_difference_expression(self, difference_expression):
-        return '(DIFFERENCE-EXPRESSION : ' \
-                f'{difference_expression.left.accept(self)}, ' \
-                f'{difference_expression.right.accept(self)})'
+        yield from self.write('DIFFERENCE-EXPRESSION', difference_expression.left, difference_expression.right)
 
     def visit_complement_expression(self, complement_expression):
-        return '(COMPLEMENT-EXPRESSION : ' \
-                f'{complement_expression.expression.accept(self)})'
+        yield from self.write('COMPLEMENT-EXPRESSION', complement_expression.expression)
 
     def visit_kleene_expression(self, kleene_expression):
-        return '(KLEENE-EXPRESSION : ' \
-                f'{kleene_expression.expression.accept(self)})'
+        yield from self.write('KLEENE-EXPRESSION', kleene_expression.expression)
 
     def visit_set(self, set):
-        return '(SET : ' \
-                f'{", ".join([ e.accept(self) for e in set.expressions ])})'
+        yield from self.write('SET', *set.expressions)
 
     def visit_symbol(self, symbol):
-        return '(SYMBOL : ' \
-                f'{symbol.identifier})'
+        self.parts.append(f'(SYMBOL : {symbol.identifier})')
     
     def visit_concatenate_expression(self, concatenate_expression):
-        return '(CONCATENATION-EXPRESSION : ' \
-                f'{concatenate_expression.left.accept(self)}, ' \
-                f'{concatenate_expression.right.accept(self)})'
+        yield from self.write('CONCATENATION-EXPRESSION', concatenate_expression.left, concatenate_expression.right)
 
     def visit_string(self, string):
-        if string.bits:
-            return '(STRING : ' \
-                    f'{string.bits if string.bits else "ε"})'
-        else:
-            return '(STRING : ε)'
+        self.parts.append(f'(STRING : {string.bits if string.bits else "ε"})')
 
 def print_ast(ast):
     print(ASTStringifier().visit(ast))
 
-class TypeChecker:
+class TypeChecker(Visitor):
 
     class Type(enum.Enum):
         LANGUAGE = enum.auto()
@@ -315,129 +368,66 @@ class TypeChecker:
         self.symbols = set()
         self.types = dict()
 
-    def visit(self, node):
-        if type(node) == Program:
-            return self.visit_program(node)
-        elif type(node) == LanguageDefinition:
-            return self.visit_language_definition(node)
-        elif type(node) == StringDefinition:
-            return self.visit_string_definition(node)
-        elif type(node) == ExclaimStatement:
-            return self.visit_exclaim_statement(node)
-        elif type(node) == InquireStatement:
-            return self.visit_inquire_statement(node)
-        elif type(node) == UnionExpression:
-            return self.visit_union_expression(node)
-        elif type(node) == IntersectExpression:
-            return self.visit_intersect_expression(node)
-        elif type(node) == ProductExpression:
-            return self.visit_product_expression(node)
-        elif type(node) == DifferenceExpression:
-            return self.visit_difference_expression(node)
-        elif type(node) == ComplementExpression:
-            return self.visit_complement_expression(node)
-        elif type(node) == KleeneExpression:
-            return self.visit_kleene_expression(node)
-        elif type(node) == Set:
-            return self.visit_set(node)
-        elif type(node) == Symbol:
-            return self.visit_symbol(node)
-        elif type(node) == ConcatenateExpression:
-            return self.visit_concatenate_expression(node)
-        elif type(node) == String:
-            return self.visit_string(node)
-        raise RuntimeError('Unknown node type')
-
     def visit_program(self, program):
         for statement in program.statements:
-            statement.accept(self)
+            yield statement
 
     def visit_language_definition(self, language_definition):
         if language_definition.symbol in self.symbols:
             raise RuntimeError(f'Symbol "{language_definition.symbol.identifier}" defined twice')
         self.symbols.add(language_definition.symbol)
         self.types[language_definition.symbol] = TypeChecker.Type.LANGUAGE
-        expression_type = language_definition.expression.accept(self)
-        if expression_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {expression_type.name}')
+        yield from self.expect(language_definition.expression, TypeChecker.Type.LANGUAGE)
             
     def visit_string_definition(self, string_definition):
         if string_definition.symbol in self.symbols:
             raise RuntimeError(f'Symbol "{string_definition.symbol.identifier}" defined twice')
         self.symbols.add(string_definition.symbol)
         self.types[string_definition.symbol] = TypeChecker.Type.STRING
-        string_expression_type = string_definition.string_expression.accept(self)
-        if string_expression_type != TypeChecker.Type.STRING:
-            raise RuntimeError(f'STRING type expected, got {string_expression_type.name}')
-        set_expression_type = string_definition.set_expression.accept(self)
-        if set_expression_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {set_expression_type.name}')
+        yield from self.expect(string_definition.string_expression, TypeChecker.Type.STRING)
+        yield from self.expect(string_definition.set_expression, TypeChecker.Type.LANGUAGE)
 
     def visit_exclaim_statement(self, exclaim_statement):
-        exclaim_statement.expression.accept(self)
+        yield exclaim_statement.expression
 
     def visit_inquire_statement(self, inquire_statement):
         if inquire_statement.symbol in self.symbols:
-            raise RuntimeError(f'Symbol "{inquire_statement.symbol.indentifier}" defined twice')
+            raise RuntimeError(f'Symbol "{inquire_statement.symbol.identifier}" defined twice')
         self.symbols.add(inquire_statement.symbol)
         self.types[inquire_statement.symbol] = TypeChecker.Type.STRING
-        expression_type = inquire_statement.expression.accept(self)
-        if expression_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {expression_type.name}')
+        yield from self.expect(inquire_statement.expression, TypeChecker.Type.LANGUAGE)
 
     def visit_union_expression(self, union_expression):
-        left_type = union_expression.left.accept(self)
-        if left_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {left_type.name}')
-        right_type = union_expression.right.accept(self)
-        if right_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {right_type.name}')
+        yield from self.expect(union_expression.left, TypeChecker.Type.LANGUAGE)
+        yield from self.expect(union_expression.right, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
 
     def visit_intersect_expression(self, intersect_expression):
-        left_type = intersect_expression.left.accept(self)
-        if left_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {left_type.name}')
-        right_type = intersect_expression.right.accept(self)
-        if right_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {right_type.name}')
+        yield from self.expect(intersect_expression.left, TypeChecker.Type.LANGUAGE)
+        yield from self.expect(intersect_expression.right, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
 
     def visit_product_expression(self, product_expression):
-        left_type = product_expression.left.accept(self)
-        if left_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {left_type.name}')
-        right_type = product_expression.right.accept(self)
-        if right_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {right_type.name}')
+        yield from self.expect(product_expression.left, TypeChecker.Type.LANGUAGE)
+        yield from self.expect(product_expression.right, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
         
     def visit_difference_expression(self, difference_expression):
-        left_type = difference_expression.left.accept(self)
-        if left_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {left_type.name}')
-        right_type = difference_expression.right.accept(self)
-        if right_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {right_type.name}')
+        yield from self.expect(difference_expression.left, TypeChecker.Type.LANGUAGE)
+        yield from self.expect(difference_expression.right, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
     
     def visit_complement_expression(self, complement_expression):
-        expression_type = complement_expression.expression.accept(self)
-        if expression_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {expression_type.name}')
+        yield from self.expect(complement_expression.expression, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
     
     def visit_kleene_expression(self, kleene_expression):
-        expression_type = kleene_expression.expression.accept(self)
-        if expression_type != TypeChecker.Type.LANGUAGE:
-            raise RuntimeError(f'LANGUAGE type expected, got {expression_type.name}')
+        yield from self.expect(kleene_expression.expression, TypeChecker.Type.LANGUAGE)
         return TypeChecker.Type.LANGUAGE
 
     def visit_set(self, set):
         for expression in set.expressions:
-            expression_type = expression.accept(self)
-            if expression_type != TypeChecker.Type.STRING:
-                raise RuntimeError(f'STRING type expected, got {expression_type.name}')
+            yield from self.expect(expression, TypeChecker.Type.STRING)
         return TypeChecker.Type.LANGUAGE
 
     def visit_symbol(self, symbol):
@@ -446,16 +436,17 @@ class TypeChecker:
         return self.types[symbol]
 
     def visit_concatenate_expression(self, concatenate_expression):
-        left_type = concatenate_expression.left.accept(self)
-        if left_type != TypeChecker.Type.STRING:
-            raise RuntimeError(f'STRING type expected, got {left_type.name}')
-        right_type = concatenate_expression.right.accept(self)
-        if right_type != TypeChecker.Type.STRING:
-            raise RuntimeError(f'STRING type expected, got {right_type.name}')
+        yield from self.expect(concatenate_expression.left, TypeChecker.Type.STRING)
+        yield from self.expect(concatenate_expression.right, TypeChecker.Type.STRING)
         return TypeChecker.Type.STRING
 
     def visit_string(self, string):
         return TypeChecker.Type.STRING
 
+    def expect(self, expression, expected_type):
+        expression_type = yield expression
+        if expression_type != expected_type:
+            raise RuntimeError(f'{expected_type.name} type expected, got {expression_type.name}')
+
 def typecheck_ast(ast):
     TypeChecker().visit(ast)
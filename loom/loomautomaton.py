@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+
+from loomast import *
+
+ALPHABET = '01'
+
+class NFA:
+
+    def __init__(self):
+        self.transitions = []
+        self.epsilon = []
+        self.start = self.add_state()
+        self.accept = self.add_state()
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def add_state(self):
+        self.transitions.append({ bit : [] for bit in ALPHABET })
+        self.epsilon.append([])
+        return len(self.transitions) - 1
+
+    def add_transition(self, source, bit, target):
+        self.transitions[source][bit].append(target)
+
+    def add_epsilon(self, source, target):
+        self.epsilon[source].append(target)
+
+    def embed(self, other):
+        offset = len(self.transitions)
+        for transitions, epsilon in zip(other.transitions, other.epsilon):
+            self.transitions.append({ bit : [ t + offset for t in targets ] for bit, targets in transitions.items() })
+            self.epsilon.append([ t + offset for t in epsilon ])
+        return other.start + offset, other.accept + offset
+
+    def epsilon_closure(self, states):
+        closure = set(states)
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            for target in self.epsilon[state]:
+                if target not in closure:
+                    closure.add(target)
+                    stack.append(target)
+        return frozenset(closure)
+
+    def move(self, states, bit):
+        return self.epsilon_closure({ t for s in states for t in self.transitions[s][bit] })
+
+    def accepts(self, bits):
+        states = self.epsilon_closure({self.start})
+        for bit in bits:
+            states = self.move(states, bit)
+            if not states:
+                return False
+        return self.accept in states
+
+    def tables(self):
+        states = sorted(self.epsilon_closure({self.start}))
+        numbers = { state : number for number, state in enumerate(states) }
+        start = tuple(range(len(states)))
+        moves = []
+        for state in states:
+            move = []
+            for bit in ALPHABET:
+                targets = sorted(self.move({state}, bit))
+                for target in targets:
+                    if target not in numbers:
+                        numbers[target] = len(states)
+                        states.append(target)
+                move.append(tuple(sorted(numbers[t] for t in targets)))
+            moves.append(tuple(move))
+        accepting = frozenset({numbers[self.accept]}) if self.accept in numbers else frozenset()
+        return tuple(moves), start, accepting
+
+    @staticmethod
+    def from_strings(strings):
+        nfa = NFA()
+        for bits in strings:
+            state = nfa.start
+            for bit in bits:
+                target = nfa.add_state()
+                nfa.add_transition(state, bit, target)
+                state = target
+            nfa.add_epsilon(state, nfa.accept)
+        return nfa
+
+    @staticmethod
+    def union(left, right):
+        nfa = NFA()
+        for operand in (left, right):
+            start, accept = nfa.embed(operand)
+            nfa.add_epsilon(nfa.start, start)
+            nfa.add_epsilon(accept, nfa.accept)
+        return nfa
+
+    @staticmethod
+    def product(left, right):
+        nfa = NFA()
+        left_start, left_accept = nfa.embed(left)
+        right_start, right_accept = nfa.embed(right)
+        nfa.add_epsilon(nfa.start, left_start)
+        nfa.add_epsilon(left_accept, right_start)
+        nfa.add_epsilon(right_accept, nfa.accept)
+        return nfa
+
+    @staticmethod
+    def kleene(operand):
+        nfa = NFA()
+        start, accept = nfa.embed(operand)
+        nfa.add_epsilon(nfa.start, start)
+        nfa.add_epsilon(nfa.start, nfa.accept)
+        nfa.add_epsilon(accept, start)
+        nfa.add_epsilon(accept, nfa.accept)
+        return nfa
+
+class DFA:
+
+    def __init__(self, transitions, accepting):
+        self.transitions = transitions
+        self.accepting = accepting
+        self.steps = dict()
+        for index, bit in enumerate(ALPHABET):
+            self.steps[bit] = self.steps[index] = tuple(transitions[index::len(ALPHABET)])
+
+    def __len__(self):
+        return len(self.transitions) // len(ALPHABET)
+
+    def accepts(self, bits):
+        steps = self.steps
+        state = 0
+        for bit in bits:
+            state = steps[bit][state]
+        return state in self.accepting
+
+    def tables(self):
+        return tuple(self.transitions), self.accepting
+
+    def counts(self, length):
+        if length < 0:
+            raise RuntimeError(f'Length {length} is negative')
+        distribution = [1] + [0] * (len(self) - 1)
+        counts = []
+        for _ in range(length + 1):
+            counts.append(sum(distribution[state] for state in self.accepting))
+            step = [0] * len(self)
+            for state, ways in enumerate(distribution):
+                if ways:
+                    for index in range(len(ALPHABET)):
+                        step[self.transitions[2 * state + index]] += ways
+            distribution = step
+        return counts
+
+    def count(self, length):
+        if length < 0:
+            raise RuntimeError(f'Length {length} is negative')
+        if length <= len(self) ** 2 * max(1, length.bit_length()):
+            return self.counts(length)[-1]
+        matrix = [ [0] * len(self) for _ in range(len(self)) ]
+        for state in range(len(self)):
+            for index in range(len(ALPHABET)):
+                matrix[state][self.transitions[2 * state + index]] += 1
+        distribution = [ [1] + [0] * (len(self) - 1) ]
+        while length:
+            if length & 1:
+                distribution = multiply(distribution, matrix)
+            matrix = multiply(matrix, matrix)
+            length >>= 1
+        return sum(distribution[0][state] for state in self.accepting)
+
+    def strings(self, max_length=None):
+        if max_length is not None and max_length < 0:
+            raise RuntimeError(f'Length {max_length} is negative')
+        live = [frozenset(self.accepting)]
+        length = 0
+        while live[-1] and (max_length is None or length <= max_length):
+            while len(live) <= length:
+                live.append(frozenset(state for state in range(len(self))
+                                      if any(self.transitions[2 * state + index] in live[-1] for index in range(len(ALPHABET)))))
+            if 0 in live[length]:
+                stack = [(0, '')]
+                while stack:
+                    state, prefix = stack.pop()
+                    remaining = length - len(prefix)
+                    if not remaining:
+                        yield prefix
+                        continue
+                    for index in reversed(range(len(ALPHABET))):
+                        target = self.transitions[2 * state + index]
+                        if target in live[remaining - 1]:
+                            stack.append((target, prefix + ALPHABET[index]))
+            length += 1
+
+    def to_nfa(self):
+        nfa = NFA()
+        states = [ nfa.add_state() for _ in range(len(self)) ]
+        nfa.add_epsilon(nfa.start, states[0])
+        for state in range(len(self)):
+            for index, bit in enumerate(ALPHABET):
+                nfa.add_transition(states[state], bit, states[self.transitions[2 * state + index]])
+            if state in self.accepting:
+                nfa.add_epsilon(states[state], nfa.accept)
+        return nfa
+
+    def complement(self):
+        return DFA(self.transitions, frozenset(range(len(self))) - self.accepting)
+
+    def minimize(self):
+        states = range(len(self))
+        inverse = [ [ [] for _ in states ] for _ in ALPHABET ]
+        for state in states:
+            for index in range(len(ALPHABET)):
+                inverse[index][self.transitions[2 * state + index]].append(state)
+        accepting = frozenset(self.accepting)
+        rejecting = frozenset(states) - accepting
+        partition = [ block for block in (accepting, rejecting) if block ]
+        waiting = [ min(partition, key=len) ]
+        while waiting:
+            splitter = waiting.pop()
+            for index in range(len(ALPHABET)):
+                predecessors = { s for t in splitter for s in inverse[index][t] }
+                if not predecessors:
+                    continue
+                refined = []
+                for block in partition:
+                    inside = block & predecessors
+                    outside = block - predecessors
+                    if not inside or not outside:
+                        refined.append(block)
+                        continue
+                    refined += [inside, outside]
+                    if block in waiting:
+                        waiting.remove(block)
+                        waiting += [inside, outside]
+                    else:
+                        waiting.append(min(inside, outside, key=len))
+                partition = refined
+        blocks = { state : block for block in partition for state in block }
+        return self.quotient(lambda state: blocks[state])
+
+    def quotient(self, key):
+        numbers = { key(0) : 0 }
+        representatives = [0]
+        transitions = []
+        for state in representatives:
+            for index in range(len(ALPHABET)):
+                target = self.transitions[2 * state + index]
+                if key(target) not in numbers:
+                    numbers[key(target)] = len(representatives)
+                    representatives.append(target)
+                transitions.append(numbers[key(target)])
+        accepting = frozenset(n for n, s in enumerate(representatives) if s in self.accepting)
+        return DFA(transitions, accepting)
+
+    @staticmethod
+    def from_nfa(nfa):
+        start = nfa.epsilon_closure({nfa.start})
+        numbers = { start : 0 }
+        subsets = [start]
+        transitions = []
+        for subset in subsets:
+            for bit in ALPHABET:
+                target = nfa.move(subset, bit)
+                if target not in numbers:
+                    numbers[target] = len(subsets)
+                    subsets.append(target)
+                transitions.append(numbers[target])
+        accepting = frozenset(n for n, subset in enumerate(subsets) if nfa.accept in subset)
+        return DFA(transitions, accepting)
+
+    @staticmethod
+    def product(left, right, operation):
+        numbers = { (0, 0) : 0 }
+        pairs = [(0, 0)]
+        transitions = []
+        for left_state, right_state in pairs:
+            for index in range(len(ALPHABET)):
+                target = (left.transitions[2 * left_state + index], right.transitions[2 * right_state + index])
+                if target not in numbers:
+                    numbers[target] = len(pairs)
+                    pairs.append(target)
+                transitions.append(numbers[target])
+        accepting = frozenset(n for n, (l, r) in enumerate(pairs)
+                              if operation(l in left.accepting, r in right.accepting))
+        return DFA(transitions, accepting)
+
+def multiply(left, right):
+    columns = list(zip(*right))
+    return [ [ sum(l * r for l, r in zip(row, column) if l) for column in columns ] for row in left ]
+
+class NFABuilder(Visitor):
+
+    def __init__(self):
+        self.languages = dict()
+        self.strings = dict()
+        self.cache = dict()
+
+    def build(self, node):
+        return self.visit(node)
+
+    def dispatch(self, node):
+        if type(node) in STATEMENTS:
+            return super().dispatch(node)
+        if node not in self.cache:
+            return remember(self.cache, node, super().dispatch(node))
+        return self.cache[node]
+
+    def define_language(self, symbol, expression):
+        self.languages[symbol.identifier] = self.build(expression)
+
+    def define_string(self, symbol, expression):
+        self.strings[symbol.identifier] = None if expression is None else self.build(expression)
+
+    def visit_program(self, program):
+        for statement in program.statements:
+            statement.accept(self)
+
+    def visit_language_definition(self, language_definition):
+        self.define_language(language_definition.symbol, language_definition.expression)
+
+    def visit_string_definition(self, string_definition):
+        self.define_string(string_definition.symbol, string_definition.string_expression)
+
+    def visit_exclaim_statement(self, exclaim_statement):
+        pass
+
+    def visit_inquire_statement(self, inquire_statement):
+        self.define_string(inquire_statement.symbol, None)
+
+    def visit_union_expression(self, union_expression):
+        left = yield union_expression.left
+        right = yield union_expression.right
+        if left is None or right is None:
+            return None
+        return NFA.union(left, right)
+
+    def visit_intersect_expression(self, intersect_expression):
+        return None
+
+    def visit_product_expression(self, product_expression):
+        left = yield product_expression.left
+        right = yield product_expression.right
+        if left is None or right is None:
+            return None
+        return NFA.product(left, right)
+
+    def visit_difference_expression(self, difference_expression):
+        return None
+
+    def visit_complement_expression(self, complement_expression):
+        return None
+
+    def visit_kleene_expression(self, kleene_expression):
+        operand = yield kleene_expression.expression
+        if operand is None:
+            return None
+        return NFA.kleene(operand)
+
+    def visit_set(self, set):
+        strings = []
+        for expression in set.expressions:
+            strings.append((yield expression))
+        if None in strings:
+            return None
+        return NFA.from_strings(strings)
+
+    def visit_symbol(self, symbol):
+        if symbol.identifier in self.strings:
+            return self.strings[symbol.identifier]
+        return self.languages.get(symbol.identifier)
+
+    def visit_concatenate_expression(self, concatenate_expression):
+        strings = []
+        for operand in concatenation_operands(concatenate_expression):
+            strings.append((yield operand))
+        if None in strings:
+            return None
+        return ''.join(strings)
+
+    def visit_string(self, string):
+        return string.bits
+
+class DFABuilder(NFABuilder):
+
+    def visit_union_expression(self, union_expression):
+        return (yield from self.combine(union_expression, lambda l, r: l or r))
+
+    def visit_intersect_expression(self, intersect_expression):
+        return (yield from self.combine(intersect_expression, lambda l, r: l and r))
+
+    def visit_product_expression(self, product_expression):
+        left = yield product_expression.left
+        right = yield product_expression.right
+        if left is None or right is None:
+            return None
+        return DFA.from_nfa(NFA.product(left.to_nfa(), right.to_nfa())).minimize()
+
+    def visit_difference_expression(self, difference_expression):
+        return (yield from self.combine(difference_expression, lambda l, r: l and not r))
+
+    def visit_complement_expression(self, complement_expression):
+        operand = yield complement_expression.expression
+        if operand is None:
+            return None
+        return operand.complement()
+
+    def visit_kleene_expression(self, kleene_expression):
+        operand = yield kleene_expression.expression
+        if operand is None:
+            return None
+        return DFA.from_nfa(NFA.kleene(operand.to_nfa())).minimize()
+
+    def visit_set(self, set):
+        nfa = yield from super().visit_set(set)
+        if nfa is None:
+            return None
+        return DFA.from_nfa(nfa).minimize()
+
+    def combine(self, expression, operation):
+        left = yield expression.left
+        right = yield expression.right
+        if left is None or right is None:
+            return None
+        return DFA.product(left, right, operation).minimize()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import glob
+import hashlib
+import os
+import tempfile
+import time
+
+CACHE_SIZE = 64 << 20
+CHUNK_SIZE = 1 << 16
+TEMPORARY_AGE = 60 * 60
+LOOM_PATH = os.path.dirname(os.path.abspath(__file__))
+
+def cache_directory():
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'loom')
+
+def remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def compiler_version():
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(LOOM_PATH, 'loom*.py'))):
+        with open(path, 'rb') as module:
+            digest.update(module.read())
+    return digest.hexdigest()
+
+class Cache:
+
+    def __init__(self, directory=None, size=CACHE_SIZE):
+        self.directory = directory or cache_directory()
+        self.size = size
+        self.version = compiler_version()
+
+    def key(self, source, options):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(repr(sorted(options.items())).encode())
+        chunk = source.read(CHUNK_SIZE)
+        while chunk:
+            digest.update(chunk)
+            chunk = source.read(CHUNK_SIZE)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.py')
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as artifact:
+                program = artifact.read()
+            os.utime(self.path(key))
+            return program
+        except OSError:
+            return None
+
+    def put(self, key, program):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(descriptor, 'w') as artifact:
+                artifact.write(program)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            remove(temporary)
+            return
+        except BaseException:
+            remove(temporary)
+            raise
+        self.evict()
+
+    def evict(self):
+        stale = time.time() - TEMPORARY_AGE
+        for path in glob.glob(os.path.join(self.directory, '*.tmp')):
+            try:
+                if os.stat(path).st_mtime < stale:
+                    os.unlink(path)
+            except OSError:
+                pass
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.py')):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.size:
+                break
+            remove(path)
+            total -= size
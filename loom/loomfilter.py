@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import collections
+from concurrent import futures
+import itertools
+from loomast import references
+from loomautomaton import DFA, DFABuilder
+
+BATCH_SIZE = 1 << 12
+BATCHES_PER_JOB = 2
+
+worker_dfa = None
+
+def required_statements(tree, identifier):
+    required = { identifier }
+    statements = []
+    for statement in reversed(tree.statements):
+        symbol = getattr(statement, 'symbol', None)
+        if symbol is not None and symbol.identifier in required:
+            required |= references(statement)
+            statements.append(statement)
+    return statements[::-1]
+
+def compile_language(tree, identifier):
+    builder = DFABuilder()
+    for statement in required_statements(tree, identifier):
+        statement.accept(builder)
+    if identifier not in builder.languages:
+        raise RuntimeError(f'Language "{identifier}" not defined')
+    dfa = builder.languages[identifier]
+    if dfa is None:
+        raise RuntimeError(f'Language "{identifier}" depends on inquired input and cannot be compiled')
+    return dfa
+
+def match_lines(dfa, lines):
+    for line in lines:
+        bits = line.rstrip('\r\n')
+        yield bits, not bits.strip('01') and dfa.accepts(bits)
+
+def render(results, annotate):
+    if annotate:
+        return ''.join(f'{bits}\t{int(accepted)}\n' for bits, accepted in results)
+    return ''.join(f'{bits}\n' for bits, accepted in results if accepted)
+
+def start_worker(tables):
+    global worker_dfa
+    worker_dfa = DFA(*tables)
+
+def match_batch(lines, annotate):
+    return render(match_lines(worker_dfa, lines), annotate)
+
+def filter_lines(dfa, source, output, annotate=False, jobs=1):
+    if jobs > 1:
+        return filter_lines_parallel(dfa, source, output, annotate, jobs)
+    results = match_lines(dfa, source)
+    batch = list(itertools.islice(results, BATCH_SIZE))
+    while batch:
+        output.write(render(batch, annotate))
+        batch = list(itertools.islice(results, BATCH_SIZE))
+
+def filter_lines_parallel(dfa, source, output, annotate, jobs):
+    with futures.ProcessPoolExecutor(jobs, initializer=start_worker, initargs=(dfa.tables(),)) as executor:
+        pending = collections.deque()
+        batch = list(itertools.islice(source, BATCH_SIZE))
+        while batch:
+            if len(pending) >= jobs * BATCHES_PER_JOB:
+                output.write(pending.popleft().result())
+            pending.append(executor.submit(match_batch, batch, annotate))
+            batch = list(itertools.islice(source, BATCH_SIZE))
+        while pending:
+            output.write(pending.popleft().result())
@@ -3,147 +3,552 @@
 import abc
 from functools import partial
 from loomast import *
+from loomautomaton import DFABuilder, NFABuilder
+from loomopt import LengthAnalyser
+from loomtrace import span
 
-class ProgramGenerator:
+RUNTIME = {
+    'memoize' : '''def memoize(key, predicate):
+    def memoized(item, start, end, memo):
+        span = (key, start, end)
+        if span not in memo:
+            memo[span] = predicate(item, start, end, memo)
+        return memo[span]
+    return memoized''',
+    'span_lengths' : '''def span_lengths(lengths, low, high):
+    if lengths is None:
+        return range(0)
+    minimum, maximum, step = lengths
+    if maximum is not None:
+        high = min(high, maximum)
+    if low <= minimum:
+        low = minimum
+    elif step:
+        low += -(low - minimum) % step
+    else:
+        return range(0)
+    return range(low, high + 1, step or 1)''',
+    'has_length' : '''def has_length(lengths, length):
+    return bool(span_lengths(lengths, length, length))''',
+    'product' : '''def product(left, right, lengths, item, start, end, memo):
+    left_lengths, right_lengths = lengths
+    for length in span_lengths(left_lengths, 0, end - start):
+        middle = start + length
+        if has_length(right_lengths, end - middle) and left(item, start, middle, memo) and right(item, middle, end, memo):
+            return True
+    return False''',
+    'kleene' : '''def kleene(key, body, lengths, item, start, end, memo):
+    if (key, start) not in memo:
+        reached = [False] * (len(item) + 1)
+        reached[start] = True
+        for middle in range(start, len(item)):
+            if reached[middle]:
+                for length in span_lengths(lengths, 1, len(item) - middle):
+                    stop = middle + length
+                    if not reached[stop] and body(item, middle, stop, memo):
+                        reached[stop] = True
+        memo[(key, start)] = reached
+    return memo[(key, start)][end]''',
+    'trie_ends' : '''def trie_ends(trie, item, start, end, memo):
+    children, terminal = trie
+    node = 0
+    if node in terminal:
+        yield start
+    for index in range(start, end):
+        node = children[2 * node + int(item[index])]
+        if not node:
+            return
+        if node in terminal:
+            yield index + 1''',
+    'trie_product' : '''def trie_product(trie, right, lengths, item, start, end, memo):
+    for middle in trie_ends(trie, item, start, end, memo):
+        if has_length(lengths, end - middle) and right(item, middle, end, memo):
+            return True
+    return False''',
+    'trie_kleene' : '''def trie_kleene(key, trie, item, start, end, memo):
+    if (key, start) not in memo:
+        reached = [False] * (len(item) + 1)
+        reached[start] = True
+        for middle in range(start, len(item)):
+            if reached[middle]:
+                for stop in trie_ends(trie, item, middle, len(item), memo):
+                    reached[stop] = True
+        memo[(key, start)] = reached
+    return memo[(key, start)][end]''',
+    'nfa_accepts' : '''def nfa_accepts(nfa, item, start, end, memo):
+    transitions, states, accepting = nfa
+    for index in range(start, end):
+        bit = int(item[index])
+        states = { target for state in states for target in transitions[state][bit] }
+        if not states:
+            return False
+    return not accepting.isdisjoint(states)''',
+    'dfa_accepts' : '''def dfa_accepts(dfa, item, start, end, memo):
+    transitions, accepting = dfa
+    state = 0
+    for index in range(start, end):
+        state = transitions[2 * state + int(item[index])]
+    return state in accepting''',
+    'input_chunks' : '''def input_chunks():
+    import sys
+    chunk = sys.stdin.readline(1 << 16)
+    if not chunk:
+        raise EOFError("EOF when reading a line")
+    while chunk:
+        ended = chunk.endswith("\\n")
+        line = chunk[:-1] if ended else chunk
+        assert not line.strip("01"), "Input string is not binary"
+        yield line
+        if ended:
+            break
+        chunk = sys.stdin.readline(1 << 16)''',
+    'nfa_stream' : '''def nfa_stream(nfa, collect):
+    transitions, states, accepting = nfa
+    chunks = []
+    for chunk in input_chunks():
+        for bit in chunk:
+            states = { target for state in states for target in transitions[state][int(bit)] }
+        if collect:
+            chunks.append(chunk)
+    return collect("".join(chunks)) if collect else None, not accepting.isdisjoint(states)''',
+    'dfa_stream' : '''def dfa_stream(dfa, collect):
+    transitions, accepting = dfa[0], dfa[1]
+    steps = { "0" : transitions[0::2], "1" : transitions[1::2] }
+    state = 0
+    chunks = []
+    for chunk in input_chunks():
+        for bit in chunk:
+            state = steps[bit][state]
+        if collect:
+            chunks.append(chunk)
+    return collect("".join(chunks)) if collect else None, state in accepting''',
+}
 
-    def __init__(self):
+PACKED_RUNTIME = dict(RUNTIME, **{
+    'kleene' : RUNTIME['kleene'].replace('len(item)', 'item[1]'),
+    'trie_kleene' : RUNTIME['trie_kleene'].replace('len(item)', 'item[1]'),
+    'pack_string' : '''def pack_string(text):
+    return int(text or "0", 2), len(text)''',
+    'unpack_string' : '''def unpack_string(item):
+    value, length = item
+    return format(value, "b").zfill(length) if length else ""''',
+    'concatenate' : '''def concatenate(items):
+    value, length = 0, 0
+    for item_value, item_length in items:
+        value = value << item_length | item_value
+        length += item_length
+    return value, length''',
+    'string_bytes' : '''def string_bytes(item, memo):
+    if "bytes" not in memo:
+        value, length = item
+        memo["bytes"] = value.to_bytes((length + 7) // 8, "big"), -length % 8
+    return memo["bytes"]''',
+    'string_span' : '''def string_span(item, start, end, memo):
+    data, pad = string_bytes(item, memo)
+    first, last = start + pad, end + pad
+    value = int.from_bytes(data[first >> 3:(last + 7) >> 3], "big") >> (-last % 8)
+    return value & ((1 << (end - start)) - 1), end - start''',
+    'trie_ends' : '''def trie_ends(trie, item, start, end, memo):
+    children, terminal = trie
+    data, pad = string_bytes(item, memo)
+    node = 0
+    if node in terminal:
+        yield start
+    for index in range(start + pad, end + pad):
+        node = children[2 * node + (data[index >> 3] >> (7 - (index & 7)) & 1)]
+        if not node:
+            return
+        if node in terminal:
+            yield index - pad + 1''',
+    'nfa_accepts' : '''def nfa_accepts(nfa, item, start, end, memo):
+    transitions, states, accepting = nfa
+    data, pad = string_bytes(item, memo)
+    for index in range(start + pad, end + pad):
+        bit = data[index >> 3] >> (7 - (index & 7)) & 1
+        states = { target for state in states for target in transitions[state][bit] }
+        if not states:
+            return False
+    return not accepting.isdisjoint(states)''',
+    'dfa_strides' : '''def dfa_strides(dfa):
+    transitions, accepting = dfa
+    strides = []
+    for state in range(len(transitions) // 2):
+        for byte in range(256):
+            target = state
+            for shift in range(7, -1, -1):
+                target = transitions[2 * target + (byte >> shift & 1)]
+            strides.append(target)
+    return transitions, accepting, strides''',
+    'dfa_accepts' : '''def dfa_accepts(dfa, item, start, end, memo):
+    transitions, accepting, strides = dfa
+    data, pad = string_bytes(item, memo)
+    index, stop = start + pad, end + pad
+    state = 0
+    while index < stop and index & 7:
+        state = transitions[2 * state + (data[index >> 3] >> (7 - (index & 7)) & 1)]
+        index += 1
+    while index + 8 <= stop:
+        state = strides[state << 8 | data[index >> 3]]
+        index += 8
+    while index < stop:
+        state = transitions[2 * state + (data[index >> 3] >> (7 - (index & 7)) & 1)]
+        index += 1
+    return state in accepting''',
+})
+
+EXPRESSIONS = { UnionExpression, IntersectExpression, ProductExpression, DifferenceExpression,
+                ComplementExpression, KleeneExpression, Set, ConcatenateExpression, String }
+
+def trie_tables(strings):
+    children = [0, 0]
+    terminal = set()
+    for bits in strings:
+        node = 0
+        for bit in bits:
+            if not children[2 * node + int(bit)]:
+                children[2 * node + int(bit)] = len(children) // 2
+                children += [0, 0]
+            node = children[2 * node + int(bit)]
+        terminal.add(node)
+    return tuple(children), frozenset(terminal)
+
+class ProgramGenerator(Visitor):
+
+    def __init__(self, packed=False, stream=False):
+        self.packed = packed
+        self.stream = stream
+        self.prefix = ''
         self.string_count = 0
         self.set_count = 0
+        self.nfa_count = 0
+        self.dfa_count = 0
+        self.trie_count = 0
+        self.runtime = []
         self.program = []
         self.environment = dict()
+        self.definitions = dict()
+        self.tables = dict()
+        self.tries = dict()
+        self.streams = []
+        self.referenced = set()
+        self.expressions = dict()
+        self.lengths = LengthAnalyser()
 
-    def visit(self, node):
-        if type(node) == Program:
-            return self.visit_program(node)
-        elif type(node) == LanguageDefinition:
-            return self.visit_language_definition(node)
-        elif type(node) == StringDefinition:
-            return self.visit_string_definition(node)
-        elif type(node) == ExclaimStatement:
-            return self.visit_exclaim_statement(node)
-        elif type(node) == InquireStatement:
-            return self.visit_inquire_statement(node)
-        elif type(node) == UnionExpression:
-            return self.visit_union_expression(node)
-        elif type(node) == IntersectExpression:
-            return self.visit_intersect_expression(node)
-        elif type(node) == ProductExpression:
-            return self.visit_product_expression(node)
-        elif type(node) == DifferenceExpression:
-            return self.visit_difference_expression(node)
-        elif type(node) == ComplementExpression:
-            return self.visit_complement_expression(node)
-        elif type(node) == KleeneExpression:
-            return self.visit_kleene_expression(node)
-        elif type(node) == Set:
-            return self.visit_set(node)
-        elif type(node) == Symbol:
-            return self.visit_symbol(node)
-        elif type(node) == ConcatenateExpression:
-            return self.visit_concatenate_expression(node)
-        elif type(node) == String:
-            return self.visit_string(node)
-        raise RuntimeError('Unknown node type')
+    def dispatch(self, node):
+        if type(node) not in EXPRESSIONS:
+            return super().dispatch(node)
+        if node not in self.expressions:
+            return remember(self.expressions, node, super().dispatch(node))
+        return self.expressions[node]
 
     def visit_program(self, program):
-        for statement in program.statements:
-            statement.accept(self)
-        return '\n'.join(self.program)
+        for index, statement in enumerate(program.statements):
+            with span(type(statement).__name__, statement=True, index=index) as trace:
+                lines = len(self.program)
+                statement.accept(self)
+                trace['lines'] = len(self.program) - lines
+        return self.link()
+
+    def link(self):
+        for index, local in self.streams:
+            collect = 'None'
+            if local in self.referenced:
+                collect = 'str'
+                if self.packed:
+                    self.require('pack_string')
+                    collect = 'pack_string'
+            self.program[index] = self.program[index].format(collect=collect)
+        return '\n'.join(self.runtime + self.program)
 
     def visit_language_definition(self, language_definition):
         variable = language_definition.expression.accept(self)
         self.environment[language_definition.symbol.identifier] = variable
+        self.definitions[language_definition.symbol.identifier] = language_definition.expression
+        self.lengths.define_language(language_definition.symbol, language_definition.expression)
 
     def visit_string_definition(self, string_definition):
         variable = string_definition.string_expression.accept(self)
         self.environment[string_definition.symbol.identifier] = variable
+        self.lengths.define_string(string_definition.symbol, string_definition.string_expression)
         predicate = string_definition.set_expression.accept(self)
-        self.program.append(f'assert {predicate}({variable}), "String does not satisfy predicate"')
+        self.program.append(f'assert {predicate}({variable}, 0, {self.length(variable)}, {{}}), "String does not satisfy predicate"')
 
     def visit_exclaim_statement(self, exclaim_statement):
         local = exclaim_statement.expression.accept(self)
-        self.program.append(f'print({local})')
+        if self.packed:
+            self.require('unpack_string')
+            self.program.append(f'print(unpack_string({local}))')
+        else:
+            self.program.append(f'print({local})')
 
     def visit_inquire_statement(self, inquire_statement):
         local = self.next_string()
         self.environment[inquire_statement.symbol.identifier] = local
+        self.lengths.define_string(inquire_statement.symbol, None)
         predicate = inquire_statement.expression.accept(self)
+        if self.stream and predicate in self.tables:
+            matcher, table = self.tables[predicate]
+            self.require('input_chunks')
+            self.require(f'{matcher}_stream')
+            self.streams.append((len(self.program), local))
+            self.program.append(f'{local}, accepted = {matcher}_stream({table}, {{collect}})')
+            self.program.append(f'assert accepted, "String does not satisfy predicate"')
+            return
         self.program.append(f'{local} = input()')
         self.program.append(f'assert all(x in "01" for x in {local}), "Input string is not binary"')
-        self.program.append(f'assert {predicate}({local}), "String does not satisfy predicate"')
+        if self.packed:
+            self.require('pack_string')
+            self.program.append(f'{local} = pack_string({local})')
+        self.program.append(f'assert {predicate}({local}, 0, {self.length(local)}, {{}}), "String does not satisfy predicate"')
 
     def visit_union_expression(self, union_expression):
-        left_argument = union_expression.left.accept(self)
-        right_argument = union_expression.right.accept(self)
+        left_argument = yield union_expression.left
+        right_argument = yield union_expression.right
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: {left_argument}(item) or {right_argument}(item)')
+        self.program.append(f'{variable} = lambda item, start, end, memo: {left_argument}(item, start, end, memo) or {right_argument}(item, start, end, memo)')
         return variable
 
     def visit_intersect_expression(self, intersect_expression):
-        left_argument = intersect_expression.left.accept(self)
-        right_argument = intersect_expression.right.accept(self)
+        left_argument = yield intersect_expression.left
+        right_argument = yield intersect_expression.right
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: {left_argument}(left) and {right_argument}(item)')
+        self.program.append(f'{variable} = lambda item, start, end, memo: {left_argument}(item, start, end, memo) and {right_argument}(item, start, end, memo)')
         return variable
 
     def visit_product_expression(self, product_expression):
-        left_argument = product_expression.left.accept(self)
-        right_argument = product_expression.right.accept(self)
+        codewords = self.codewords(product_expression.left)
+        if codewords is not None:
+            trie = self.emit_trie(codewords)
+            right_argument = yield product_expression.right
+            variable = self.next_set()
+            lengths = self.length_table(product_expression.right)
+            self.require('memoize')
+            self.require('trie_product')
+            self.program.append(f'{variable} = memoize("{variable}", lambda item, start, end, memo: trie_product({trie}, {right_argument}, {lengths!r}, item, start, end, memo))')
+            return variable
+        left_argument = yield product_expression.left
+        right_argument = yield product_expression.right
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: any({left_argument}(item[:i]) and {right_argument}(item[i:]) for i in range(len(item) + 1))')
+        lengths = (self.length_table(product_expression.left), self.length_table(product_expression.right))
+        self.require('memoize')
+        self.require('product')
+        self.program.append(f'{variable} = memoize("{variable}", lambda item, start, end, memo: product({left_argument}, {right_argument}, {lengths!r}, item, start, end, memo))')
         return variable
 
     def visit_difference_expression(self, difference_expression):
-        left_argument = difference_expression.left.accept(self)
-        right_argument = difference_expression.right.accept(self)
+        left_argument = yield difference_expression.left
+        right_argument = yield difference_expression.right
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: {left_argument}(item) and not {right_argument}(item)')
+        self.program.append(f'{variable} = lambda item, start, end, memo: {left_argument}(item, start, end, memo) and not {right_argument}(item, start, end, memo)')
         return variable
 
     def visit_complement_expression(self, complement_expression):
-        argument = complement_expression.expression.accept(self)
+        argument = yield complement_expression.expression
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: not {argument}(item)')
+        self.program.append(f'{variable} = lambda item, start, end, memo: not {argument}(item, start, end, memo)')
         return variable
 
     def visit_kleene_expression(self, kleene_expression):
-        argument = kleene_expression.expression.accept(self)
+        codewords = self.codewords(kleene_expression.expression)
+        if codewords is not None:
+            trie = self.emit_trie(codewords)
+            variable = self.next_set()
+            lengths = self.length_table(kleene_expression)
+            self.require('has_length')
+            self.require('trie_kleene')
+            self.program.append(f'{variable} = lambda item, start, end, memo: has_length({lengths!r}, end - start) '
+                                f'and trie_kleene("{variable}", {trie}, item, start, end, memo)')
+            return variable
+        argument = yield kleene_expression.expression
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: True if len(item) == 0 else any({argument}(item[:i]) and {variable}(item[i:]) for i in range(len(item) + 1))')
+        lengths = self.length_table(kleene_expression)
+        self.require('kleene')
+        self.program.append(f'{variable} = lambda item, start, end, memo: has_length({lengths!r}, end - start) '
+                            f'and kleene("{variable}", {argument}, {self.length_table(kleene_expression.expression)!r}, item, start, end, memo)')
         return variable
 
     def visit_set(self, set):
         variables = []
         for expression in set.expressions:
-            variables.append(expression.accept(self))
+            variables.append((yield expression))
         variable = self.next_set()
-        self.program.append(f'{variable} = lambda item: item in [{",".join(variables)}]')
+        self.program.append(f'{variable}_members = frozenset([{",".join(variables)}])')
+        if self.packed:
+            self.require('string_span')
+            self.program.append(f'{variable} = lambda item, start, end, memo: string_span(item, start, end, memo) in {variable}_members')
+        else:
+            self.program.append(f'{variable} = lambda item, start, end, memo: item[start:end] in {variable}_members')
         return variable
 
     def visit_symbol(self, symbol):
+        self.referenced.add(self.environment[symbol.identifier])
         return self.environment[symbol.identifier]
 
     def visit_concatenate_expression(self, concatenate_expression):
-        left_argument = concatenate_expression.left.accept(self)
-        right_argument = concatenate_expression.right.accept(self)
+        arguments = []
+        for operand in concatenation_operands(concatenate_expression):
+            arguments.append((yield operand))
         variable = self.next_string()
-        self.program.append(f'{variable} = {left_argument} + {right_argument}')
+        if len(arguments) > 2:
+            if self.packed:
+                self.require('concatenate')
+                self.program.append(f'{variable} = concatenate(({",".join(arguments)}))')
+            else:
+                self.program.append(f'{variable} = "".join(({",".join(arguments)}))')
+            return variable
+        left_argument, right_argument = arguments
+        if self.packed:
+            self.program.append(f'{variable} = ({left_argument}[0] << {right_argument}[1] | {right_argument}[0], {left_argument}[1] + {right_argument}[1])')
+        else:
+            self.program.append(f'{variable} = {left_argument} + {right_argument}')
         return variable
 
     def visit_string(self, string):
         variable = self.next_string()
-        self.program.append(f'{variable} = "{string.bits}"')
+        if self.packed:
+            self.program.append(f'{variable} = ({int(string.bits or "0", 2)}, {len(string.bits)})')
+        else:
+            self.program.append(f'{variable} = "{string.bits}"')
         return variable
 
     def next_string(self):
-        variable = 'string_' + str(self.string_count)
+        variable = self.prefix + 'string_' + str(self.string_count)
         self.string_count += 1
         return variable
 
     def next_set(self):
-        variable = 'set_' + str(self.set_count)
+        variable = self.prefix + 'set_' + str(self.set_count)
         self.set_count += 1
         return variable
 
-def generate_program(ast):
-    return ProgramGenerator().visit(ast)
+    def next_nfa(self):
+        variable = self.prefix + 'nfa_' + str(self.nfa_count)
+        self.nfa_count += 1
+        return variable
+
+    def next_dfa(self):
+        variable = self.prefix + 'dfa_' + str(self.dfa_count)
+        self.dfa_count += 1
+        return variable
+
+    def next_trie(self):
+        variable = self.prefix + 'trie_' + str(self.trie_count)
+        self.trie_count += 1
+        return variable
+
+    def length(self, variable):
+        if self.packed:
+            return f'{variable}[1]'
+        return f'len({variable})'
+
+    def codewords(self, expression):
+        while type(expression) == Symbol and expression.identifier in self.definitions:
+            expression = self.definitions[expression.identifier]
+        if type(expression) != Set or not all(type(e) == String for e in expression.expressions):
+            return None
+        return tuple(e.bits for e in expression.expressions)
+
+    def emit_trie(self, codewords):
+        if codewords not in self.tries:
+            self.tries[codewords] = self.next_trie()
+            self.program.append(f'{self.tries[codewords]} = {trie_tables(codewords)!r}')
+        return self.tries[codewords]
+
+    def length_table(self, expression):
+        lengths = self.lengths.build(expression)
+        return None if lengths is None else tuple(lengths)
+
+    def require(self, name):
+        runtime = PACKED_RUNTIME if self.packed else RUNTIME
+        if name in ('product', 'kleene', 'trie_product', 'has_length'):
+            self.require('span_lengths')
+        if name in ('product', 'kleene', 'trie_product'):
+            self.require('has_length')
+        if name in ('trie_product', 'trie_kleene'):
+            self.require('trie_ends')
+        if self.packed and name in ('string_span', 'nfa_accepts', 'dfa_accepts', 'trie_ends'):
+            self.require('string_bytes')
+        if runtime[name] not in self.runtime:
+            self.runtime.append(runtime[name])
+
+class NFAProgramGenerator(ProgramGenerator):
+
+    def __init__(self, packed=False, stream=False):
+        super().__init__(packed, stream)
+        self.builder = NFABuilder()
+
+    def visit_language_definition(self, language_definition):
+        super().visit_language_definition(language_definition)
+        self.builder.define_language(language_definition.symbol, language_definition.expression)
+
+    def visit_string_definition(self, string_definition):
+        super().visit_string_definition(string_definition)
+        self.builder.define_string(string_definition.symbol, string_definition.string_expression)
+
+    def visit_inquire_statement(self, inquire_statement):
+        self.builder.define_string(inquire_statement.symbol, None)
+        super().visit_inquire_statement(inquire_statement)
+
+    def visit_union_expression(self, union_expression):
+        return self.compile(union_expression) or super().visit_union_expression(union_expression)
+
+    def visit_product_expression(self, product_expression):
+        return self.compile(product_expression) or super().visit_product_expression(product_expression)
+
+    def visit_kleene_expression(self, kleene_expression):
+        return self.compile(kleene_expression) or super().visit_kleene_expression(kleene_expression)
+
+    def visit_set(self, set):
+        return self.compile(set) or super().visit_set(set)
+
+    def compile(self, expression):
+        automaton = self.builder.build(expression)
+        if automaton is None:
+            return None
+        return self.emit(automaton)
+
+    def emit(self, nfa):
+        self.require('nfa_accepts')
+        table = self.next_nfa()
+        self.program.append(f'{table} = {nfa.tables()!r}')
+        variable = self.next_set()
+        self.program.append(f'{variable} = lambda item, start, end, memo: nfa_accepts({table}, item, start, end, memo)')
+        self.tables[variable] = ('nfa', table)
+        return variable
+
+class DFAProgramGenerator(NFAProgramGenerator):
+
+    def __init__(self, packed=False, stream=False):
+        super().__init__(packed, stream)
+        self.builder = DFABuilder()
+
+    def visit_intersect_expression(self, intersect_expression):
+        return self.compile(intersect_expression) or super().visit_intersect_expression(intersect_expression)
+
+    def visit_difference_expression(self, difference_expression):
+        return self.compile(difference_expression) or super().visit_difference_expression(difference_expression)
+
+    def visit_complement_expression(self, complement_expression):
+        return self.compile(complement_expression) or super().visit_complement_expression(complement_expression)
+
+    def emit(self, dfa):
+        self.require('dfa_accepts')
+        table = self.next_dfa()
+        if self.packed:
+            self.require('dfa_strides')
+            self.program.append(f'{table} = dfa_strides({dfa.tables()!r})')
+        else:
+            self.program.append(f'{table} = {dfa.tables()!r}')
+        variable = self.next_set()
+        self.program.append(f'{variable} = lambda item, start, end, memo: dfa_accepts({table}, item, start, end, memo)')
+        self.tables[variable] = ('dfa', table)
+        return variable
+
+BACKENDS = {
+    'lambda' : ProgramGenerator,
+    'nfa'    : NFAProgramGenerator,
+    'dfa'    : DFAProgramGenerator,
+}
+
+def generate_program(ast, backend='lambda', packed=False, stream=False):
+    return BACKENDS[backend](packed, stream).visit(ast)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+from loomast import typecheck_ast
+from loomautomaton import DFABuilder
+from loomparse import parse
+from loomtoken import tokenize
+
+class Language:
+
+    def __init__(self, identifier, dfa):
+        self.identifier = identifier
+        self.dfa = dfa
+
+    def __contains__(self, bits):
+        return not bits.strip('01') and self.dfa.accepts(bits)
+
+    def __repr__(self):
+        return f'<Language : {self.identifier}>'
+
+    def match_many(self, strings):
+        return [ bits in self for bits in strings ]
+
+    def strings(self, max_length=None):
+        return self.dfa.strings(max_length)
+
+    def count(self, length):
+        return self.dfa.count(length)
+
+    def counts(self, length):
+        return self.dfa.counts(length)
+
+class Environment:
+
+    def __init__(self, languages, strings, output):
+        self.languages = languages
+        self.strings = strings
+        self.output = output
+
+    def __contains__(self, identifier):
+        return identifier in self.languages or identifier in self.strings
+
+    def __getitem__(self, identifier):
+        if identifier in self.languages:
+            return self.language(identifier)
+        return self.string(identifier)
+
+    def language(self, identifier):
+        if identifier not in self.languages:
+            raise RuntimeError(f'Language "{identifier}" not defined')
+        if self.languages[identifier] is None:
+            raise RuntimeError(f'Language "{identifier}" depends on inquired input that was not provided')
+        return self.languages[identifier]
+
+    def string(self, identifier):
+        if identifier not in self.strings:
+            raise RuntimeError(f'String "{identifier}" not defined')
+        if self.strings[identifier] is None:
+            raise RuntimeError(f'String "{identifier}" depends on inquired input that was not provided')
+        return self.strings[identifier]
+
+class Evaluator(DFABuilder):
+
+    def __init__(self, inputs):
+        super().__init__()
+        self.inputs = inputs
+        self.output = []
+
+    def visit_program(self, program):
+        super().visit_program(program)
+        languages = { identifier : None if dfa is None else Language(identifier, dfa)
+                      for identifier, dfa in self.languages.items() }
+        return Environment(languages, dict(self.strings), self.output)
+
+    def visit_string_definition(self, string_definition):
+        super().visit_string_definition(string_definition)
+        self.check(string_definition.symbol, string_definition.set_expression)
+
+    def visit_exclaim_statement(self, exclaim_statement):
+        bits = exclaim_statement.expression.accept(self)
+        if bits is not None:
+            self.output.append(bits)
+
+    def visit_inquire_statement(self, inquire_statement):
+        identifier = inquire_statement.symbol.identifier
+        if identifier not in self.inputs:
+            return super().visit_inquire_statement(inquire_statement)
+        if self.inputs[identifier].strip('01'):
+            raise RuntimeError(f'Input "{identifier}" is not binary')
+        self.strings[identifier] = self.inputs[identifier]
+        self.check(inquire_statement.symbol, inquire_statement.expression)
+
+    def check(self, symbol, set_expression):
+        bits = self.strings[symbol.identifier]
+        dfa = self.build(set_expression)
+        if bits is not None and dfa is not None and not dfa.accepts(bits):
+            raise RuntimeError(f'String "{symbol.identifier}" does not satisfy predicate')
+
+def compile(source, inputs=None):
+    tree = parse(tokenize(source))
+    typecheck_ast(tree)
+    return Evaluator(inputs or dict()).visit(tree)
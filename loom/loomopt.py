@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+import functools
+import math
+from loomast import *
+
+FOLD_LIMIT = 256
+
+Lengths = namedtuple('Lengths', ['minimum', 'maximum', 'step'])
+
+ANY_LENGTH = Lengths(0, None, 1)
+
+def make_lengths(minimum, maximum, step):
+    if maximum is not None:
+        if maximum < minimum:
+            return None
+        maximum -= (maximum - minimum) % step if step else maximum - minimum
+        if maximum == minimum:
+            step = 0
+    return Lengths(minimum, maximum, step)
+
+def lengths_of(lengths):
+    lengths = list(lengths)
+    if not lengths:
+        return None
+    minimum = min(lengths)
+    return make_lengths(minimum, max(lengths), functools.reduce(math.gcd, [ length - minimum for length in lengths ], 0))
+
+def lengths_union(left, right):
+    if left is None or right is None:
+        return left or right
+    maximum = None if left.maximum is None or right.maximum is None else max(left.maximum, right.maximum)
+    step = math.gcd(math.gcd(left.step, right.step), abs(left.minimum - right.minimum))
+    return make_lengths(min(left.minimum, right.minimum), maximum, step)
+
+def lengths_intersection(left, right):
+    if left is None or right is None:
+        return None
+    minimum = max(left.minimum, right.minimum)
+    if left.step:
+        minimum += -(minimum - left.minimum) % left.step
+    elif minimum != left.minimum:
+        return None
+    maximum = left.maximum if right.maximum is None else right.maximum
+    if left.maximum is not None:
+        maximum = min(maximum, left.maximum)
+    return make_lengths(minimum, maximum, left.step)
+
+def lengths_product(left, right):
+    if left is None or right is None:
+        return None
+    maximum = None if left.maximum is None or right.maximum is None else left.maximum + right.maximum
+    return make_lengths(left.minimum + right.minimum, maximum, math.gcd(left.step, right.step))
+
+def lengths_kleene(body):
+    if body is None or body.maximum == 0:
+        return Lengths(0, 0, 0)
+    return Lengths(0, None, math.gcd(body.minimum, body.step))
+
+class ConstantFolder(Visitor):
+
+    def __init__(self, limit=FOLD_LIMIT):
+        self.limit = limit
+        self.languages = dict()
+        self.strings = dict()
+
+    def visit_program(self, program):
+        statements = []
+        for statement in program.statements:
+            statements.append((yield statement))
+        return Program(statements)
+
+    def visit_language_definition(self, language_definition):
+        expression, members = yield from self.fold(language_definition.expression)
+        self.languages[language_definition.symbol.identifier] = members
+        return LanguageDefinition(language_definition.symbol, expression)
+
+    def visit_string_definition(self, string_definition):
+        self.strings[string_definition.symbol.identifier] = yield string_definition.string_expression
+        expression, _ = yield from self.fold(string_definition.set_expression)
+        return StringDefinition(string_definition.symbol, string_definition.string_expression, expression)
+
+    def visit_exclaim_statement(self, exclaim_statement):
+        return exclaim_statement
+
+    def visit_inquire_statement(self, inquire_statement):
+        self.strings[inquire_statement.symbol.identifier] = None
+        expression, _ = yield from self.fold(inquire_statement.expression)
+        return InquireStatement(inquire_statement.symbol, expression)
+
+    def visit_union_expression(self, union_expression):
+        left, left_members = yield from self.fold(union_expression.left)
+        right, right_members = yield from self.fold(union_expression.right)
+        if left_members is None or right_members is None:
+            return UnionExpression(left, right), None
+        return UnionExpression(left, right), left_members | right_members
+
+    def visit_intersect_expression(self, intersect_expression):
+        left, left_members = yield from self.fold(intersect_expression.left)
+        right, right_members = yield from self.fold(intersect_expression.right)
+        if left_members == frozenset() or right_members == frozenset():
+            return IntersectExpression(left, right), frozenset()
+        if left_members is None or right_members is None:
+            return IntersectExpression(left, right), None
+        return IntersectExpression(left, right), left_members & right_members
+
+    def visit_product_expression(self, product_expression):
+        left, left_members = yield from self.fold(product_expression.left)
+        right, right_members = yield from self.fold(product_expression.right)
+        if left_members == frozenset() or right_members == frozenset():
+            return ProductExpression(left, right), frozenset()
+        if left_members is None or right_members is None \
+                or len(left_members) * len(right_members) > self.limit:
+            return ProductExpression(left, right), None
+        return ProductExpression(left, right), frozenset(l + r for l in left_members for r in right_members)
+
+    def visit_difference_expression(self, difference_expression):
+        left, left_members = yield from self.fold(difference_expression.left)
+        right, right_members = yield from self.fold(difference_expression.right)
+        if left_members == frozenset():
+            return DifferenceExpression(left, right), frozenset()
+        if left_members is None or right_members is None:
+            return DifferenceExpression(left, right), None
+        return DifferenceExpression(left, right), left_members - right_members
+
+    def visit_complement_expression(self, complement_expression):
+        expression, _ = yield from self.fold(complement_expression.expression)
+        return ComplementExpression(expression), None
+
+    def visit_kleene_expression(self, kleene_expression):
+        expression, members = yield from self.fold(kleene_expression.expression)
+        if members is not None and members <= { '' }:
+            return KleeneExpression(expression), frozenset([ '' ])
+        return KleeneExpression(expression), None
+
+    def visit_set(self, set):
+        members = []
+        for expression in set.expressions:
+            members.append((yield expression))
+        if None in members:
+            return set, None
+        return set, frozenset(members)
+
+    def visit_symbol(self, symbol):
+        if symbol.identifier in self.languages:
+            return symbol, self.languages[symbol.identifier]
+        return self.strings[symbol.identifier]
+
+    def visit_concatenate_expression(self, concatenate_expression):
+        strings = []
+        for operand in concatenation_operands(concatenate_expression):
+            strings.append((yield operand))
+        if None in strings:
+            return None
+        return ''.join(strings)
+
+    def visit_string(self, string):
+        return string.bits
+
+    def fold(self, expression):
+        expression, members = yield expression
+        if members is not None and len(members) > self.limit:
+            return expression, None
+        if not self.limit or members is None:
+            return expression, members
+        if type(expression) == Symbol:
+            return expression, members
+        if type(expression) == Set and all(type(e) == String for e in expression.expressions):
+            return expression, members
+        return Set([ String(bits) for bits in sorted(members, key=lambda bits: (len(bits), bits)) ]), members
+
+def fold_constants(ast, limit=FOLD_LIMIT):
+    return ConstantFolder(limit).visit(ast)
+
+class LengthAnalyser(Visitor):
+
+    def __init__(self):
+        self.languages = dict()
+        self.strings = dict()
+        self.cache = dict()
+
+    def build(self, node):
+        return self.visit(node)
+
+    def dispatch(self, node):
+        if type(node) in STATEMENTS:
+            return super().dispatch(node)
+        if node not in self.cache:
+            return remember(self.cache, node, super().dispatch(node))
+        return self.cache[node]
+
+    def define_language(self, symbol, expression):
+        self.languages[symbol.identifier] = self.build(expression)
+
+    def define_string(self, symbol, expression):
+        self.strings[symbol.identifier] = None if expression is None else self.build(expression)
+
+    def visit_program(self, program):
+        for statement in program.statements:
+            statement.accept(self)
+
+    def visit_language_definition(self, language_definition):
+        self.define_language(language_definition.symbol, language_definition.expression)
+
+    def visit_string_definition(self, string_definition):
+        self.define_string(string_definition.symbol, string_definition.string_expression)
+
+    def visit_exclaim_statement(self, exclaim_statement):
+        pass
+
+    def visit_inquire_statement(self, inquire_statement):
+        self.define_string(inquire_statement.symbol, None)
+
+    def visit_union_expression(self, union_expression):
+        return lengths_union((yield union_expression.left), (yield union_expression.right))
+
+    def visit_intersect_expression(self, intersect_expression):
+        return lengths_intersection((yield intersect_expression.left), (yield intersect_expression.right))
+
+    def visit_product_expression(self, product_expression):
+        return lengths_product((yield product_expression.left), (yield product_expression.right))
+
+    def visit_difference_expression(self, difference_expression):
+        yield difference_expression.right
+        return (yield difference_expression.left)
+
+    def visit_complement_expression(self, complement_expression):
+        yield complement_expression.expression
+        return ANY_LENGTH
+
+    def visit_kleene_expression(self, kleene_expression):
+        return lengths_kleene((yield kleene_expression.expression))
+
+    def visit_set(self, set):
+        lengths = []
+        for expression in set.expressions:
+            lengths.append((yield expression))
+        if None in lengths:
+            return ANY_LENGTH
+        return lengths_of(lengths)
+
+    def visit_symbol(self, symbol):
+        if symbol.identifier in self.strings:
+            return self.strings[symbol.identifier]
+        return self.languages[symbol.identifier]
+
+    def visit_concatenate_expression(self, concatenate_expression):
+        lengths = []
+        for operand in concatenation_operands(concatenate_expression):
+            lengths.append((yield operand))
+        if None in lengths:
+            return None
+        return sum(lengths)
+
+    def visit_string(self, string):
+        return len(string.bits)
@@ -1,277 +1,283 @@
 #!/usr/bin/env python3
 
-from copy import deepcopy
+import functools
 import loomast
 import loomtoken
 from loomtoken import TokenType
 
-def lookahead(tokens, *expected):
-    seen = all([ type(token) == expected_type for (token, expected_type) in zip(tokens, expected) ])
-    if not seen:
-        return [], tokens
-    return tokens[:len(expected)], tokens[len(expected):]
+def memoize(rule):
+    @functools.wraps(rule)
+    def memoized(self, position):
+        key = (rule.__name__, position)
+        if key not in self.memo:
+            self.memo[key] = rule(self, position)
+        return self.memo[key]
+    return memoized
 
-def parse(tokens):
-    next_tokens = deepcopy(tokens)
-    _, next_tokens = parse_newlines(next_tokens)
-    statements = []
-    statement, next_tokens = parse_statement(next_tokens)
-    newlines, next_tokens = parse_newlines(next_tokens)
-    while statement:
-        statements.append(statement)
-        statement, next_tokens = parse_statement(next_tokens)
-        _, next_tokens = parse_newlines(next_tokens)
-    if next_tokens:
-        raise RuntimeError(f'Unexpected token {next_tokens[0]}')
-    return loomast.Program(statements)
+SET_OPERATORS = {
+    loomtoken.Union : (0, loomast.UnionExpression),
+    loomtoken.Intersect : (1, loomast.IntersectExpression),
+    loomtoken.Product : (2, loomast.ProductExpression),
+    loomtoken.Difference : (3, loomast.DifferenceExpression),
+}
 
-def parse_newlines(tokens):
-    next_tokens = deepcopy(tokens)
-    newlines = []
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Newline)
-    while seen:
-        newlines += seen
-        seen, next_tokens = lookahead(next_tokens, loomtoken.Newline)
-    return newlines, next_tokens
+STRING_OPERATORS = {
+    loomtoken.Concatenate : (0, loomast.ConcatenateExpression),
+}
 
-def parse_statement(tokens):
-    next_tokens = deepcopy(tokens)
-    language_definition, next_tokens = parse_language_definition(next_tokens)
-    if language_definition:
-        return language_definition, next_tokens
-    string_definition, next_tokens = parse_string_definition(next_tokens)
-    if string_definition:
-        return string_definition, next_tokens
-    exclaim_statement, next_tokens = parse_exclaim_statement(next_tokens)
-    if exclaim_statement:
-        return exclaim_statement, next_tokens
-    inquire_statement, next_tokens = parse_inquire_statement(next_tokens)
-    if inquire_statement:
-        return inquire_statement, next_tokens
-    return None, tokens
+def reduce_operators(stack, operand, operators, precedence=-1):
+    while stack and type(stack[-1]) == tuple and operators[stack[-1][1]][0] > precedence:
+        left, operator = stack.pop()
+        operand = operators[operator][1](left, operand)
+    return operand
 
-def parse_language_definition(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Symbol, loomtoken.Define)
-    if not seen:
-        return None, tokens
-    symbol = loomast.Symbol(seen[0].identifier)
-    expression, next_tokens = parse_set_expression(next_tokens)
-    if not expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Newline)
-    if not seen:
-        return None, tokens
-    return loomast.LanguageDefinition(symbol, expression), next_tokens
+class Parser:
 
-def parse_string_definition(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Symbol, loomtoken.Define)
-    if not seen:
-        return None, tokens
-    symbol = loomast.Symbol(seen[0].identifier)
-    string_expression, next_tokens = parse_string_expression(next_tokens)
-    if not string_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.In)
-    if not seen:
-        return None, tokens
-    set_expression, next_tokens = parse_set_expression(next_tokens)
-    if not set_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Newline)
-    if not seen:
-        return None, tokens
-    return loomast.StringDefinition(symbol, string_expression, set_expression), next_tokens
+    def __init__(self, tokens):
+        self.tokens = tuple(tokens)
+        self.memo = dict()
 
-def parse_exclaim_statement(tokens):
-    next_tokens = deepcopy(tokens)
-    expression, next_tokens = parse_string_expression(next_tokens)
-    if not expression:
-        return None, next_tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Exclamation)
-    if seen:
-        return loomast.ExclaimStatement(expression), next_tokens
-    return None, tokens
+    def lookahead(self, position, *expected):
+        seen = self.tokens[position:position + len(expected)]
+        if not all([ type(token) == expected_type for (token, expected_type) in zip(seen, expected) ]):
+            return [], position
+        return list(seen), position + len(seen)
 
-def parse_inquire_statement(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Symbol, loomtoken.In)
-    if not seen:
-        return None, tokens
-    symbol = loomast.Symbol(seen[0].identifier)
-    set_expression, next_tokens = parse_set_expression(next_tokens)
-    if not set_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Inquiry, loomtoken.Newline)
-    if not seen:
-        return None, tokens
-    return loomast.InquireStatement(symbol, set_expression), next_tokens
+    def token_type(self, position):
+        return type(self.tokens[position]) if position < len(self.tokens) else None
 
-def parse_set_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    return parse_union_expression(next_tokens)
+    def parse_program(self):
+        return loomast.Program(list(self.parse_statements()))
 
-def parse_union_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    left_expression, next_tokens = parse_intersect_expression(next_tokens)
-    if not left_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Union)
-    if not seen:
-        return left_expression, next_tokens
-    right_expression, next_tokens = parse_union_expression(next_tokens)
-    if not right_expression:
-        return None, tokens
-    return loomast.UnionExpression(left_expression, right_expression), next_tokens
+    def parse_statements(self):
+        _, position = self.parse_newlines(0)
+        statement, position = self.parse_statement(position)
+        _, position = self.parse_newlines(position)
+        while statement:
+            yield statement
+            self.memo.clear()
+            statement, position = self.parse_statement(position)
+            _, position = self.parse_newlines(position)
+        if position < len(self.tokens):
+            raise RuntimeError(f'Unexpected token {self.tokens[position]}')
 
-def parse_intersect_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    left_expression, next_tokens = parse_product_expression(next_tokens)
-    if not left_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Intersect)
-    if not seen:
-        return left_expression, next_tokens
-    right_expression, next_tokens = parse_intersect_expression(next_tokens)
-    if not right_expression:
-        return None, tokens
-    return loomast.IntersectExpression(left_expression, right_expression), next_tokens
+    def parse_newlines(self, position):
+        newlines = []
+        seen, position = self.lookahead(position, loomtoken.Newline)
+        while seen:
+            newlines += seen
+            seen, position = self.lookahead(position, loomtoken.Newline)
+        return newlines, position
 
-def parse_product_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    left_expression, next_tokens = parse_difference_expression(next_tokens)
-    if not left_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Product)
-    if not seen:
-        return left_expression, next_tokens
-    right_expression, next_tokens = parse_product_expression(next_tokens)
-    if not right_expression:
-        return None, tokens
-    return loomast.ProductExpression(left_expression, right_expression), next_tokens
+    @memoize
+    def parse_statement(self, position):
+        language_definition, next_position = self.parse_language_definition(position)
+        if language_definition:
+            return language_definition, next_position
+        string_definition, next_position = self.parse_string_definition(position)
+        if string_definition:
+            return string_definition, next_position
+        exclaim_statement, next_position = self.parse_exclaim_statement(position)
+        if exclaim_statement:
+            return exclaim_statement, next_position
+        inquire_statement, next_position = self.parse_inquire_statement(position)
+        if inquire_statement:
+            return inquire_statement, next_position
+        return None, position
 
-def parse_difference_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    left_expression, next_tokens = parse_complement_expression(next_tokens)
-    if not left_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Difference)
-    if not seen:
-        return left_expression, next_tokens
-    right_expression, next_tokens = parse_difference_expression(next_tokens)
-    if not right_expression:
-        return None, tokens
-    return loomast.DifferenceExpression(left_expression, right_expression), next_tokens
+    @memoize
+    def parse_language_definition(self, position):
+        seen, next_position = self.lookahead(position, loomtoken.Symbol, loomtoken.Define)
+        if not seen:
+            return None, position
+        symbol = loomast.Symbol(seen[0].identifier)
+        expression, next_position = self.parse_set_expression(next_position)
+        if not expression:
+            return None, position
+        seen, next_position = self.lookahead(next_position, loomtoken.Newline)
+        if not seen:
+            return None, position
+        return loomast.LanguageDefinition(symbol, expression), next_position
 
-def parse_complement_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Complement)
-    if seen:
-        return loomast.ComplementExpression(parse_kleene_expression(next_tokens)), next_tokens
-    return parse_kleene_expression(next_tokens)
+    @memoize
+    def parse_string_definition(self, position):
+        seen, next_position = self.lookahead(position, loomtoken.Symbol, loomtoken.Define)
+        if not seen:
+            return None, position
+        symbol = loomast.Symbol(seen[0].identifier)
+        string_expression, next_position = self.parse_string_expression(next_position)
+        if not string_expression:
+            return None, position
+        seen, next_position = self.lookahead(next_position, loomtoken.In)
+        if not seen:
+            return None, position
+        set_expression, next_position = self.parse_set_expression(next_position)
+        if not set_expression:
+            return None, position
+        seen, next_position = self.lookahead(next_position, loomtoken.Newline)
+        if not seen:
+            return None, position
+        return loomast.StringDefinition(symbol, string_expression, set_expression), next_position
 
-def parse_kleene_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    expression, next_tokens = parse_set_parenthesis_expression(next_tokens)
-    if not expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Star)
-    if seen:
-        return loomast.KleeneExpression(expression), next_tokens
-    return expression, next_tokens
+    @memoize
+    def parse_exclaim_statement(self, position):
+        expression, next_position = self.parse_string_expression(position)
+        if not expression:
+            return None, position
+        seen, next_position = self.lookahead(next_position, loomtoken.Exclamation)
+        if seen:
+            return loomast.ExclaimStatement(expression), next_position
+        return None, position
 
-def parse_set_parenthesis_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.LeftParenthesis)
-    if seen:
-        expression, next_tokens = parse_set_expression(next_tokens)
-        seen, next_tokens = lookahead(next_tokens, loomtoken.RightParenthesis)
+    @memoize
+    def parse_inquire_statement(self, position):
+        seen, next_position = self.lookahead(position, loomtoken.Symbol, loomtoken.In)
         if not seen:
-            return None, tokens
-        return expression, next_tokens
-    set, next_tokens = parse_set(next_tokens)
-    if set:
-        return set, next_tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Symbol)
-    if seen:
-        return loomast.Symbol(seen[0].identifier), next_tokens
-    return None, tokens
-
-def parse_set(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.LeftBrace)
-    if seen:
-        expressions, next_tokens = parse_string_expression_list(next_tokens)
-        if not expressions:
-            return None, tokens
-        seen, next_tokens = lookahead(next_tokens, loomtoken.RightBrace)
+            return None, position
+        symbol = loomast.Symbol(seen[0].identifier)
+        set_expression, next_position = self.parse_set_expression(next_position)
+        if not set_expression:
+            return None, position
+        seen, next_position = self.lookahead(next_position, loomtoken.Inquiry, loomtoken.Newline)
         if not seen:
-            return None, tokens
-        return loomast.Set(expressions), next_tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.EmptySet)
-    if not seen:
-        return None, tokens
-    return loomast.Set([]), next_tokens
+            return None, position
+        return loomast.InquireStatement(symbol, set_expression), next_position
 
-def parse_string_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    return parse_concatenate_expression(next_tokens)
+    @memoize
+    def parse_set_expression(self, position):
+        start = position
+        stack = []
+        while True:
+            operand = None
+            while not operand:
+                seen, position = self.lookahead(position, loomtoken.Complement)
+                if not seen:
+                    seen, position = self.lookahead(position, loomtoken.LeftParenthesis)
+                if seen:
+                    stack.append(type(seen[0]))
+                    continue
+                operand, position = self.parse_set_operand(position)
+                if not operand:
+                    return None, start
+            while True:
+                seen, position = self.lookahead(position, loomtoken.Star)
+                if seen:
+                    operand = loomast.KleeneExpression(operand)
+                while stack and stack[-1] is loomtoken.Complement:
+                    stack.pop()
+                    operand = loomast.ComplementExpression(operand)
+                operator = self.token_type(position)
+                if operator in SET_OPERATORS:
+                    operand = reduce_operators(stack, operand, SET_OPERATORS, SET_OPERATORS[operator][0])
+                    stack.append((operand, operator))
+                    position += 1
+                    break
+                operand = reduce_operators(stack, operand, SET_OPERATORS)
+                if stack and operator is loomtoken.RightParenthesis:
+                    stack.pop()
+                    position += 1
+                    continue
+                if stack:
+                    return None, start
+                return operand, position
 
-def parse_concatenate_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    left_expression, next_tokens = parse_string_parenthesis_expression(next_tokens)
-    if not left_expression:
-        return None, tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Concatenate)
-    if not seen:
-        return left_expression, next_tokens
-    right_expression, next_tokens = parse_concatenate_expression(next_tokens)
-    if not right_expression:
-        return None, tokens
-    return loomast.ConcatenateExpression(left_expression, right_expression), next_tokens
+    @memoize
+    def parse_set_operand(self, position):
+        set, next_position = self.parse_set(position)
+        if set:
+            return set, next_position
+        seen, next_position = self.lookahead(position, loomtoken.Symbol)
+        if seen:
+            return loomast.Symbol(seen[0].identifier), next_position
+        return None, position
 
-def parse_string_parenthesis_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.LeftParenthesis)
-    if seen:
-        expression, next_tokens = parse_string_expression(next_tokens)
-        if not expression:
-            return None, tokens
-        seen, next_tokens = lookahead(next_tokens, loomtoken.RightParenthesis)
+    @memoize
+    def parse_set(self, position):
+        seen, next_position = self.lookahead(position, loomtoken.LeftBrace)
+        if seen:
+            expressions, next_position = self.parse_string_expression_list(next_position)
+            if not expressions:
+                return None, position
+            seen, next_position = self.lookahead(next_position, loomtoken.RightBrace)
+            if not seen:
+                return None, position
+            return loomast.Set(expressions), next_position
+        seen, next_position = self.lookahead(position, loomtoken.EmptySet)
         if not seen:
-            return None, tokens
-        return expression, next_tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.String)
-    if seen:
-        return loomast.String(seen[0].bits), next_tokens
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Symbol)
-    if seen:
-        return loomast.Symbol(seen[0].identifier), next_tokens
-    return None, tokens
+            return None, position
+        return loomast.Set([]), next_position
+
+    @memoize
+    def parse_string_expression(self, position):
+        start = position
+        stack = []
+        while True:
+            seen, position = self.lookahead(position, loomtoken.LeftParenthesis)
+            if seen:
+                stack.append(loomtoken.LeftParenthesis)
+                continue
+            operand, position = self.parse_string_operand(position)
+            if not operand:
+                return None, start
+            while True:
+                operator = self.token_type(position)
+                if operator in STRING_OPERATORS:
+                    stack.append((operand, operator))
+                    position += 1
+                    break
+                operand = reduce_operators(stack, operand, STRING_OPERATORS)
+                if stack and operator is loomtoken.RightParenthesis:
+                    stack.pop()
+                    position += 1
+                    continue
+                if stack:
+                    return None, start
+                return operand, position
+
+    @memoize
+    def parse_string_operand(self, position):
+        seen, next_position = self.lookahead(position, loomtoken.String)
+        if seen:
+            return loomast.String(seen[0].bits), next_position
+        seen, next_position = self.lookahead(position, loomtoken.Symbol)
+        if seen:
+            return loomast.Symbol(seen[0].identifier), next_position
+        return None, position
 
-def parse_string_expression_list(tokens):
-    next_tokens = deepcopy(tokens)
-    expressions = []
-    expression, next_tokens = parse_string_expression(next_tokens)
-    if not expression:
-        return None, tokens
-    expressions.append(expression)
-    seen, next_tokens = lookahead(next_tokens, loomtoken.Comma)
-    while seen:
-        expression, next_tokens = parse_string_expression(next_tokens)
+    @memoize
+    def parse_string_expression_list(self, position):
+        expressions = []
+        expression, next_position = self.parse_string_expression(position)
         if not expression:
-            return None, tokens
+            return None, position
         expressions.append(expression)
-        seen, next_tokens = lookahead(next_tokens, loomtoken.Comma)
-    return expressions, next_tokens
+        seen, next_position = self.lookahead(next_position, loomtoken.Comma)
+        while seen:
+            expression, next_position = self.parse_string_expression(next_position)
+            if not expression:
+                return None, position
+            expressions.append(expression)
+            seen, next_position = self.lookahead(next_position, loomtoken.Comma)
+        return expressions, next_position
 
-def parse_expression(tokens):
-    next_tokens = deepcopy(tokens)
-    set_expression, next_tokens = parse_set_expression(next_tokens)
-    if set_expression:
-        return set_expression, next_tokens
-    string_expression, next_tokens = parse_string_expression(next_tokens)
-    if string_expression:
-        return string_expression, next_tokens
-    return None, tokens
+    @memoize
+    def parse_expression(self, position):
+        set_expression, next_position = self.parse_set_expression(position)
+        if set_expression:
+            return set_expression, next_position
+        string_expression, next_position = self.parse_string_expression(position)
+        if string_expression:
+            return string_expression, next_position
+        return None, position
+
+def parse_statements(tokens):
+    line = []
+    for token in tokens:
+        line.append(token)
+        if type(token) == loomtoken.Newline:
+            yield from Parser(line).parse_statements()
+            line = []
+    yield from Parser(line).parse_statements()
+
+def parse(tokens):
+    return loomast.Program(list(parse_statements(tokens)))
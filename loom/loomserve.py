@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import asyncio
+import time
+from loomautomaton import DFABuilder
+
+BATCH_SIZE = 1 << 8
+
+def compile_languages(tree):
+    builder = DFABuilder()
+    tree.accept(builder)
+    return { identifier : dfa for identifier, dfa in builder.languages.items() if dfa is not None }
+
+class Latency:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def __str__(self):
+        mean = self.total / self.count if self.count else 0.0
+        return f'{self.count}\t{mean * 1e6:.1f}\t{self.maximum * 1e6:.1f}'
+
+class MembershipServer:
+
+    def __init__(self, languages, batch_size=BATCH_SIZE):
+        self.languages = languages
+        self.batch_size = batch_size
+        self.latencies = { identifier : Latency() for identifier in languages }
+        self.queue = None
+        self.batches = None
+
+    async def match(self, identifier, bits):
+        if identifier not in self.languages:
+            raise RuntimeError(f'Language "{identifier}" not defined')
+        if bits.strip('01'):
+            raise RuntimeError('Query string is not binary')
+        result = asyncio.get_running_loop().create_future()
+        await self.queue.put((identifier, bits, time.perf_counter(), result))
+        return await result
+
+    async def run_batches(self):
+        while True:
+            batch = [ await self.queue.get() ]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            for identifier, bits, started, result in batch:
+                accepted = self.languages[identifier].accepts(bits)
+                self.latencies[identifier].record(time.perf_counter() - started)
+                if not result.cancelled():
+                    result.set_result(accepted)
+
+    def stats(self):
+        return ''.join(f'{identifier}\t{latency}\n' for identifier, latency in sorted(self.latencies.items()))
+
+    async def report(self):
+        return self.stats() + '\n'
+
+    async def answer(self, line):
+        try:
+            words = line.decode().split()
+        except UnicodeDecodeError:
+            return 'ERROR Query is not valid UTF-8\n'
+        if len(words) not in (1, 2):
+            return 'ERROR Expected a language and a string\n'
+        identifier, bits = words[0], words[1] if len(words) == 2 else ''
+        try:
+            return f'{int(await self.match(identifier, bits))}\n'
+        except RuntimeError as error:
+            return f'ERROR {error}\n'
+
+    async def handle(self, reader, writer):
+        answers = asyncio.Queue(self.batch_size)
+        async def respond():
+            while True:
+                answer = await answers.get()
+                if answer is None:
+                    break
+                writer.write((await answer).encode())
+                await writer.drain()
+        responder = asyncio.create_task(respond())
+        async def enqueue(answer):
+            put = asyncio.ensure_future(answers.put(answer))
+            await asyncio.wait([put, responder], return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                if answer is not None:
+                    answer.cancel()
+        try:
+            line = await reader.readline()
+            while line and not responder.done():
+                if line.split() == [b'STATS']:
+                    await enqueue(asyncio.ensure_future(self.report()))
+                else:
+                    await enqueue(asyncio.ensure_future(self.answer(line)))
+                if not responder.done():
+                    line = await reader.readline()
+            if not responder.done():
+                await enqueue(None)
+            await responder
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            responder.cancel()
+            while not answers.empty():
+                answer = answers.get_nowait()
+                if answer is not None:
+                    answer.cancel()
+            writer.close()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.batches = asyncio.create_task(self.run_batches())
+
+    def stop(self):
+        self.batches.cancel()
+
+    async def serve(self, address):
+        self.start()
+        if address.startswith('unix:'):
+            server = await asyncio.start_unix_server(self.handle, address[len('unix:'):])
+        else:
+            host, _, port = address.rpartition(':')
+            server = await asyncio.start_server(self.handle, host or None, int(port))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+def serve(tree, address, batch_size=BATCH_SIZE):
+    asyncio.run(MembershipServer(compile_languages(tree), batch_size).serve(address))
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 
 import abc
+import codecs
 import enum
 import re
 
+CHUNK_SIZE = 1 << 16
+
 class TokenType(enum.Enum):
     NEWLINE           = enum.auto() 
     SYMBOL            = enum.auto() 
@@ -206,96 +209,101 @@ class Inquiry(Token):
     def __repr__(self):
         return '<Inquiry>'
 
+TOKEN_FACTORIES = {
+    TokenType.NEWLINE           : lambda value: Newline(),
+    TokenType.SYMBOL            : Symbol,
+    TokenType.DEFINE            : lambda value: Define(),
+    TokenType.IN                : lambda value: In(),
+    TokenType.EXCLAMATION       : lambda value: Exclamation(),
+    TokenType.INQUIRY           : lambda value: Inquiry(),
+    TokenType.UNION             : lambda value: Union(),
+    TokenType.INTERSECT         : lambda value: Intersect(),
+    TokenType.PRODUCT           : lambda value: Product(),
+    TokenType.DIFFERENCE        : lambda value: Difference(),
+    TokenType.COMPLEMENT        : lambda value: Complement(),
+    TokenType.STAR              : lambda value: Star(),
+    TokenType.CONCATENATE       : lambda value: Concatenate(),
+    TokenType.LEFT_PARENTHESIS  : lambda value: LeftParenthesis(),
+    TokenType.RIGHT_PARENTHESIS : lambda value: RightParenthesis(),
+    TokenType.LEFT_BRACE        : lambda value: LeftBrace(),
+    TokenType.RIGHT_BRACE       : lambda value: RightBrace(),
+    TokenType.EMPTY_SET         : lambda value: EmptySet(),
+    TokenType.COMMA             : lambda value: Comma(),
+    TokenType.STRING            : String,
+}
+
 def make_token(type, value):
-    if type == TokenType.NEWLINE:
-        return Newline()
-    elif type == TokenType.SYMBOL:
-        return Symbol(value)
-    elif type == TokenType.DEFINE:
-        return Define()
-    elif type == TokenType.IN:
-        return In()
-    elif type == TokenType.EXCLAMATION:
-        return Exclamation()
-    elif type == TokenType.INQUIRY:
-        return Inquiry()
-    elif type == TokenType.UNION:
-        return Union()
-    elif type == TokenType.INTERSECT:
-        return Intersect()
-    elif type == TokenType.PRODUCT:
-        return Product()
-    elif type == TokenType.DIFFERENCE:
-        return Difference()
-    elif type == TokenType.COMPLEMENT:
-        return Complement()
-    elif type == TokenType.STAR:
-        return Star()
-    elif type == TokenType.CONCATENATE:
-        return Concatenate()
-    elif type == TokenType.LEFT_PARENTHESIS:
-        return LeftParenthesis()
-    elif type == TokenType.RIGHT_PARENTHESIS:
-        return RightParenthesis()
-    elif type == TokenType.LEFT_BRACE:
-        return LeftBrace()
-    elif type == TokenType.RIGHT_BRACE:
-        return RightBrace()
-    elif type == TokenType.EMPTY_SET:
-        return EmptySet()
-    elif type == TokenType.COMMA:
-        return Comma()
-    elif type == TokenType.STRING:
-        return String(value)
-    else:
+    if type not in TOKEN_FACTORIES:
         raise RuntimeError(f'Invalid token type {type}')
-
-
-def tokenize(source):
-    type_map = {
-        re.compile('\n') : TokenType.NEWLINE,
-        re.compile(':=') : TokenType.DEFINE,
-        re.compile('∈') : TokenType.IN,
-        re.compile('!') : TokenType.EXCLAMATION,
-        re.compile('\\?') : TokenType.INQUIRY,
-        re.compile('∪') : TokenType.UNION,
-        re.compile('∩') : TokenType.INTERSECT,
-        re.compile('×') : TokenType.PRODUCT,
-        re.compile('-') : TokenType.DIFFERENCE,
-        re.compile('¬') : TokenType.COMPLEMENT,
-        re.compile('\\*') : TokenType.STAR,
-        re.compile('\\+') : TokenType.CONCATENATE,
-        re.compile('\\(') : TokenType.LEFT_PARENTHESIS,
-        re.compile('\\)') : TokenType.RIGHT_PARENTHESIS,
-        re.compile('{') : TokenType.LEFT_BRACE,
-        re.compile('}') : TokenType.RIGHT_BRACE,
-        re.compile('∅') : TokenType.EMPTY_SET,
-        re.compile(',') : TokenType.COMMA,
-        re.compile('ε') : TokenType.STRING,
-        re.compile('(1|0)+') : TokenType.STRING,
-        re.compile('[a-zA-Z_]+') : TokenType.SYMBOL,
-        re.compile('#.*\n') : TokenType.COMMENT
-    }
-    line = 1
-    column = 1
-    while len(source) > 0:
-        if source[0] in ' \t':
-            source = source[1:]
-        else:
-            found = False
-            for pattern, type in type_map.items():
-                result = pattern.match(source)
-                if result:
-                    found = True
-                    if type == TokenType.NEWLINE:
-                        line += 1
-                        column = 1;
-                    value = result.group()
-                    column += len(value)
-                    source = source[len(value):]
-                    if type == TokenType.COMMENT:
-                        break
-                    yield make_token(type, value)
-                    break
-            if not found:
-                raise RuntimeError(f'Unknown token at line {line} column {column}: {source[:10]}')
+    return TOKEN_FACTORIES[type](value)
+
+TOKEN_PATTERN = re.compile('|'.join([
+    '(?P<WHITESPACE>[ \t]+)',
+    '(?P<NEWLINE>\n)',
+    '(?P<DEFINE>:=)',
+    '(?P<IN>∈)',
+    '(?P<EXCLAMATION>!)',
+    '(?P<INQUIRY>\?)',
+    '(?P<UNION>∪)',
+    '(?P<INTERSECT>∩)',
+    '(?P<PRODUCT>×)',
+    '(?P<DIFFERENCE>-)',
+    '(?P<COMPLEMENT>¬)',
+    '(?P<STAR>\*)',
+    '(?P<CONCATENATE>\+)',
+    '(?P<LEFT_PARENTHESIS>\()',
+    '(?P<RIGHT_PARENTHESIS>\))',
+    '(?P<LEFT_BRACE>{)',
+    '(?P<RIGHT_BRACE>})',
+    '(?P<EMPTY_SET>∅)',
+    '(?P<COMMA>,)',
+    '(?P<STRING>ε|[01]+)',
+    '(?P<SYMBOL>[a-zA-Z_]+)',
+    '(?P<COMMENT>#.*\n)',
+]))
+
+def read_chunks(source, chunk_size=CHUNK_SIZE):
+    if isinstance(source, str):
+        yield source
+        return
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    chunk = source.read(chunk_size)
+    while chunk:
+        yield decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+        chunk = source.read(chunk_size)
+    yield decoder.decode(b'', final=True)
+
+def tokenize(source, chunk_size=CHUNK_SIZE, line=1):
+    chunks = read_chunks(source, chunk_size)
+    buffer = ''
+    offset = 0
+    position = 0
+    exhausted = False
+    line_start = 0
+    while not exhausted or position < len(buffer):
+        result = TOKEN_PATTERN.match(buffer, position)
+        if not exhausted and (not result or result.end() == len(buffer)):
+            pending = [ buffer[position:] ]
+            size = 0
+            while not exhausted and size < max(len(pending[0]), 1):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append(chunk)
+                    size += len(chunk)
+            offset += position
+            buffer = ''.join(pending)
+            position = 0
+            continue
+        if not result:
+            column = offset + position - line_start + 1
+            raise RuntimeError(f'Unknown token at line {line} column {column}: {buffer[position:position + 10]}')
+        kind = result.lastgroup
+        position = result.end()
+        if kind in ('NEWLINE', 'COMMENT'):
+            line += 1
+            line_start = offset + position
+        if kind in ('WHITESPACE', 'COMMENT'):
+            continue
+        yield TOKEN_FACTORIES[TokenType[kind]](result.group())
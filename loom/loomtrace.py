@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+import threading
+import time
+
+hooks = []
+detailed = False
+
+class NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.wall = time.perf_counter() - self.start
+        self.cpu = time.process_time() - self.cpu
+        self.blocks = sys.getallocatedblocks() - self.blocks
+        for hook in list(hooks):
+            hook(self)
+        return False
+
+    def __setitem__(self, key, value):
+        self.args[key] = value
+
+def span(name, statement=False, **args):
+    if not hooks or (statement and not detailed):
+        return NULL_SPAN
+    return Span(name, args)
+
+def add_hook(hook):
+    hooks.append(hook)
+
+def remove_hook(hook):
+    hooks.remove(hook)
+
+def tracing():
+    return bool(hooks)
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif hasattr(node, 'accept'):
+            count += 1
+            values = [ getattr(node, name) for name in type(node).__slots__ ]
+            stack.extend(value for value in values if isinstance(value, list) or hasattr(value, 'accept'))
+    return count
+
+class ChromeTrace:
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, span):
+        args = dict(span.args, cpu_ms=span.cpu * 1e3, allocated_blocks=span.blocks)
+        self.events.append({
+            'name' : span.name,
+            'ph' : 'X',
+            'ts' : span.start * 1e6,
+            'dur' : span.wall * 1e6,
+            'pid' : os.getpid(),
+            'tid' : threading.get_ident(),
+            'args' : args,
+        })
+
+    def write(self, path):
+        with open(path, 'w') as output:
+            json.dump({ 'traceEvents' : self.events, 'displayTimeUnit' : 'ms' }, output)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def require_numpy():
+    if numpy is None:
+        raise RuntimeError('Vectorised matching requires numpy')
+
+def tables(dfa):
+    transitions = numpy.asarray(dfa.transitions, dtype=numpy.intp).reshape(len(dfa), 2)
+    accepting = numpy.zeros(len(dfa), dtype=bool)
+    accepting[sorted(dfa.accepting)] = True
+    return transitions, accepting
+
+def strides(transitions):
+    values = numpy.arange(256)
+    table = numpy.repeat(numpy.arange(len(transitions))[:, None], 256, axis=1)
+    for shift in range(7, -1, -1):
+        table = transitions[table, (values >> shift) & 1]
+    return table
+
+def match_array(dfa, bits, lengths=None):
+    require_numpy()
+    bits = numpy.asarray(bits, dtype=numpy.uint8)
+    if bits.ndim != 2:
+        raise RuntimeError(f'Expected a 2-D array of bits, got {bits.ndim} dimensions')
+    if (bits > 1).any():
+        raise RuntimeError('Bit array contains values other than 0 and 1')
+    transitions, accepting = tables(dfa)
+    states = numpy.zeros(bits.shape[0], dtype=numpy.intp)
+    if lengths is None:
+        for column in range(bits.shape[1]):
+            states = transitions[states, bits[:, column]]
+        return accepting[states]
+    lengths = numpy.asarray(lengths)
+    for column in range(bits.shape[1]):
+        active = lengths > column
+        if not active.any():
+            break
+        states = numpy.where(active, transitions[states, bits[:, column]], states)
+    return accepting[states]
+
+def match_packed(dfa, data, lengths=None):
+    require_numpy()
+    data = numpy.asarray(data, dtype=numpy.uint8)
+    if data.ndim != 2:
+        raise RuntimeError(f'Expected a 2-D array of bytes, got {data.ndim} dimensions')
+    transitions, accepting = tables(dfa)
+    table = strides(transitions)
+    states = numpy.zeros(data.shape[0], dtype=numpy.intp)
+    if lengths is None:
+        for column in range(data.shape[1]):
+            states = table[states, data[:, column]]
+        return accepting[states]
+    lengths = numpy.asarray(lengths)
+    for column in range(data.shape[1]):
+        full = lengths >= 8 * (column + 1)
+        states = numpy.where(full, table[states, data[:, column]], states)
+        partial = ~full & (lengths > 8 * column)
+        for bit in range(8):
+            active = partial & (lengths > 8 * column + bit)
+            if not active.any():
+                break
+            states = numpy.where(active, transitions[states, (data[:, column] >> (7 - bit)) & 1], states)
+    return accepting[states]
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+import os
+import time
+from loomast import Symbol, TypeChecker, references
+from loomgen import BACKENDS, NFAProgramGenerator, ProgramGenerator
+from loomopt import FOLD_LIMIT, ConstantFolder
+from loomparse import parse_statements
+from loomtoken import Newline, tokenize
+from loomtrace import span
+
+WATCH_INTERVAL = 0.25
+
+class Artifact:
+
+    def __init__(self, identifier, dependencies, checker, folder, generator):
+        self.identifier = identifier
+        self.dependencies = dependencies
+        self.program = generator.program
+        self.runtime = generator.runtime
+        self.streams = generator.streams
+        self.referenced = generator.referenced
+        if identifier is None:
+            return
+        self.type = checker.types[Symbol(identifier)]
+        language = self.type == TypeChecker.Type.LANGUAGE
+        self.members = (folder.languages if language else folder.strings)[identifier]
+        self.variable = generator.environment[identifier]
+        self.expression = generator.definitions.get(identifier)
+        while type(self.expression) == Symbol and self.expression.identifier in generator.definitions:
+            self.expression = generator.definitions[self.expression.identifier]
+        self.lengths = (generator.lengths.languages if language else generator.lengths.strings)[identifier]
+        self.automaton = None
+        if isinstance(generator, NFAProgramGenerator):
+            self.automaton = (generator.builder.languages if language else generator.builder.strings)[identifier]
+        self.table = generator.tables.get(self.variable)
+
+    def load(self, checker, folder, generator):
+        symbol = Symbol(self.identifier)
+        checker.symbols.add(symbol)
+        checker.types[symbol] = self.type
+        language = self.type == TypeChecker.Type.LANGUAGE
+        (folder.languages if language else folder.strings)[self.identifier] = self.members
+        generator.environment[self.identifier] = self.variable
+        if self.expression is not None:
+            generator.definitions[self.identifier] = self.expression
+        (generator.lengths.languages if language else generator.lengths.strings)[self.identifier] = self.lengths
+        if isinstance(generator, NFAProgramGenerator):
+            (generator.builder.languages if language else generator.builder.strings)[self.identifier] = self.automaton
+        if self.table is not None:
+            generator.tables[self.variable] = self.table
+
+class IncrementalCompiler:
+
+    def __init__(self, backend='lambda', packed=False, stream=False, fold_limit=FOLD_LIMIT):
+        self.backend = backend
+        self.packed = packed
+        self.stream = stream
+        self.fold_limit = fold_limit
+        self.lines = dict()
+        self.groups = dict()
+        self.artifacts = dict()
+        self.serial = 0
+        self.statements = 0
+        self.lexed = 0
+        self.parsed = 0
+        self.rebuilt = 0
+
+    def compile(self, source):
+        with span('rebuild') as trace:
+            statements = self.parse(source)
+            artifacts = self.build(statements)
+            trace['statements'] = self.statements
+            trace['lexed'] = self.lexed
+            trace['parsed'] = self.parsed
+            trace['rebuilt'] = self.rebuilt
+            return self.link(artifacts)
+
+    def parse(self, source):
+        lines = dict()
+        groups = dict()
+        statements = []
+        group = []
+        tokens = []
+        self.lexed = 0
+        self.parsed = 0
+        for number, line in enumerate(source.splitlines(keepends=True), 1):
+            if line not in lines:
+                if line in self.lines:
+                    lines[line] = self.lines[line]
+                else:
+                    lines[line] = list(tokenize(line, line=number))
+                    self.lexed += 1
+            if not lines[line]:
+                continue
+            group.append(line)
+            tokens.extend(lines[line])
+            if type(tokens[-1]) == Newline:
+                statements.extend(self.parse_group(''.join(group), tokens, groups))
+                group = []
+                tokens = []
+        if group:
+            statements.extend(self.parse_group(''.join(group), tokens, groups))
+        self.lines = lines
+        self.groups = groups
+        return statements
+
+    def parse_group(self, text, tokens, groups):
+        if text not in groups:
+            if text in self.groups:
+                groups[text] = self.groups[text]
+            else:
+                groups[text] = list(parse_statements(tokens))
+                self.parsed += 1
+        return groups[text]
+
+    def build(self, statements):
+        definitions = dict()
+        artifacts = dict()
+        built = []
+        self.statements = len(statements)
+        self.rebuilt = 0
+        for statement in statements:
+            symbol = getattr(statement, 'symbol', None)
+            if symbol is not None and symbol.identifier in definitions:
+                raise RuntimeError(f'Symbol "{symbol.identifier}" defined twice')
+            artifact = artifacts.get(statement) or self.artifacts.get(statement)
+            if artifact is None or any(definitions.get(identifier) is not dependency
+                                       for identifier, dependency in artifact.dependencies.items()):
+                artifact = self.build_statement(statement, symbol, definitions)
+            artifacts[statement] = artifact
+            if symbol is not None:
+                definitions[symbol.identifier] = artifact
+            built.append(artifact)
+        self.artifacts = artifacts
+        return built
+
+    def build_statement(self, statement, symbol, definitions):
+        dependencies = { identifier : definitions.get(identifier) for identifier in references(statement) }
+        checker = TypeChecker()
+        folder = ConstantFolder(self.fold_limit)
+        generator = BACKENDS[self.backend](self.packed, self.stream)
+        generator.prefix = f's{self.serial}_'
+        self.serial += 1
+        for dependency in dependencies.values():
+            if dependency is not None:
+                dependency.load(checker, folder, generator)
+        statement.accept(checker)
+        statement.accept(folder).accept(generator)
+        self.rebuilt += 1
+        return Artifact(None if symbol is None else symbol.identifier, dependencies, checker, folder, generator)
+
+    def link(self, artifacts):
+        linker = ProgramGenerator(self.packed, self.stream)
+        runtime = dict()
+        for artifact in artifacts:
+            linker.streams.extend((len(linker.program) + index, local) for index, local in artifact.streams)
+            linker.program.extend(artifact.program)
+            linker.referenced |= artifact.referenced
+            runtime.update(dict.fromkeys(artifact.runtime))
+        linker.runtime = list(runtime)
+        return linker.link()
+
+def watch(path, interval=WATCH_INTERVAL):
+    stamp = None
+    while True:
+        try:
+            status = os.stat(path)
+        except OSError:
+            time.sleep(interval)
+            continue
+        if (status.st_mtime_ns, status.st_size) == stamp:
+            time.sleep(interval)
+            continue
+        stamp = status.st_mtime_ns, status.st_size
+        with open(path, encoding='utf-8') as source:
+            yield source.read()
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+
+import io
+from unittest import mock
+
+class ProgramRunner:
+
+    def execute(self, program, item):
+        output = []
+        try:
+            with mock.patch('sys.stdin', io.StringIO(item + '\n')):
+                exec(program, {'input' : lambda: item, 'print' : output.append})
+        except AssertionError:
+            return None
+        return output
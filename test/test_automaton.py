@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+from loom import loomautomaton
+from loomautomaton import DFA, NFA
+import unittest
+
+class TestAutomaton(unittest.TestCase):
+
+    def test_nfa_strings(self):
+        nfa = NFA.from_strings(['01', '', '110'])
+        self.assertTrue(nfa.accepts(''))
+        self.assertTrue(nfa.accepts('01'))
+        self.assertTrue(nfa.accepts('110'))
+        self.assertFalse(nfa.accepts('0'))
+        self.assertFalse(nfa.accepts('11'))
+
+    def test_nfa_operators(self):
+        zero = NFA.from_strings(['0'])
+        ones = NFA.kleene(NFA.from_strings(['1']))
+        nfa = NFA.kleene(NFA.union(NFA.product(zero, ones), NFA.from_strings(['11'])))
+        for bits in ['', '0', '011', '110', '0110111', '00']:
+            self.assertTrue(nfa.accepts(bits), bits)
+        for bits in ['1', '111', '10']:
+            self.assertFalse(nfa.accepts(bits), bits)
+
+    def test_dfa_minimize(self):
+        nfa = NFA.kleene(NFA.from_strings(['0', '1', '00', '01', '10', '11']))
+        dfa = DFA.from_nfa(nfa).minimize()
+        self.assertEqual(len(dfa), 1)
+        self.assertTrue(dfa.accepts('0110'))
+
+    def test_dfa_operators(self):
+        even = DFA.from_nfa(NFA.kleene(NFA.from_strings(['00', '01', '10', '11']))).minimize()
+        zeros = DFA.from_nfa(NFA.kleene(NFA.from_strings(['0']))).minimize()
+        dfa = DFA.product(even.complement(), zeros, lambda l, r: l and not r).minimize()
+        self.assertTrue(dfa.accepts('1'))
+        self.assertTrue(dfa.accepts('011'))
+        self.assertFalse(dfa.accepts('000'))
+        self.assertFalse(dfa.accepts('01'))
+
+    def test_dfa_strings(self):
+        nfa = NFA.kleene(NFA.union(NFA.from_strings(['0']), NFA.from_strings(['11'])))
+        dfa = DFA.from_nfa(nfa).minimize()
+        self.assertEqual(list(dfa.strings(3)), ['', '0', '00', '11', '000', '011', '110'])
+        finite = DFA.from_nfa(NFA.from_strings(['101', '0', '', '11'])).minimize()
+        self.assertEqual(list(finite.strings()), ['', '0', '11', '101'])
+        self.assertEqual(list(DFA.from_nfa(NFA.from_strings([])).strings()), [])
+
+    def test_dfa_count(self):
+        nfa = NFA.kleene(NFA.union(NFA.from_strings(['0']), NFA.from_strings(['11'])))
+        dfa = DFA.from_nfa(nfa).minimize()
+        fibonacci = [1, 1]
+        while len(fibonacci) <= 3000:
+            fibonacci.append(fibonacci[-1] + fibonacci[-2])
+        self.assertEqual(dfa.counts(20), fibonacci[:21])
+        self.assertEqual(dfa.count(3000), fibonacci[3000])
+        self.assertEqual(dfa.count(10), len(list(dfa.strings(10))) - len(list(dfa.strings(9))))
+        self.assertEqual(dfa.complement().count(3000), 2 ** 3000 - fibonacci[3000])
+
+    def test_negative_length(self):
+        dfa = DFA.from_nfa(NFA.from_strings(['0'])).minimize()
+        with self.assertRaises(RuntimeError):
+            dfa.counts(-1)
+        with self.assertRaises(RuntimeError):
+            dfa.count(-1)
+        with self.assertRaises(RuntimeError):
+            list(dfa.strings(-1))
+
+if __name__ == '__main__':
+    unittest.main()
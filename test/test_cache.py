@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+from loom import loomcache
+from loomcache import Cache
+import io
+import os
+import tempfile
+import time
+import unittest
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        cache = Cache(self.directory.name)
+        key = cache.key(io.BytesIO(b'a := {0}\n'), {'backend' : 'dfa'})
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'program')
+        self.assertEqual(cache.get(key), 'program')
+        self.assertEqual(os.listdir(self.directory.name), [key + '.py'])
+
+    def test_keys(self):
+        cache = Cache(self.directory.name)
+        key = cache.key(io.BytesIO(b'a := {0}\n'), {'backend' : 'dfa'})
+        self.assertEqual(key, cache.key(io.BytesIO(b'a := {0}\n'), {'backend' : 'dfa'}))
+        self.assertNotEqual(key, cache.key(io.BytesIO(b'a := {1}\n'), {'backend' : 'dfa'}))
+        self.assertNotEqual(key, cache.key(io.BytesIO(b'a := {0}\n'), {'backend' : 'nfa'}))
+
+    def test_eviction(self):
+        cache = Cache(self.directory.name, size=35)
+        for index in range(3):
+            cache.put(f'key_{index}', '0123456789')
+            os.utime(cache.path(f'key_{index}'), (index, index))
+        cache.get('key_0')
+        cache.put('key_3', '0123456789')
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['key_0.py', 'key_2.py', 'key_3.py'])
+
+    def test_unusable_directory(self):
+        path = os.path.join(self.directory.name, 'file')
+        with open(path, 'w'):
+            pass
+        cache = Cache(path)
+        cache.put('key', 'program')
+        self.assertIsNone(cache.get('key'))
+
+    def test_stale_temporaries(self):
+        cache = Cache(self.directory.name)
+        for name, age in [('stale.tmp', loomcache.TEMPORARY_AGE + 1), ('fresh.tmp', 0)]:
+            path = os.path.join(self.directory.name, name)
+            with open(path, 'w'):
+                pass
+            os.utime(path, (time.time() - age, time.time() - age))
+        cache.put('key', 'program')
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['fresh.tmp', 'key.py'])
+
+if __name__ == '__main__':
+    unittest.main()
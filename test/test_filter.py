@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+from loom import loomfilter
+from loomast import typecheck_ast
+from loomfilter import BATCH_SIZE, BATCHES_PER_JOB, compile_language, filter_lines, required_statements
+from loomparse import parse
+from loomtoken import tokenize
+import io
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestFilter(unittest.TestCase):
+
+    def test_filter(self):
+        output = io.StringIO()
+        filter_lines(self.compile('words'), io.StringIO('0\n011\n11\n0110\n01a\n\n1101\n'), output)
+        self.assertEqual(output.getvalue(), '0\n011\n11\n1101\n')
+
+    def test_annotate(self):
+        output = io.StringIO()
+        filter_lines(self.compile('pairs'), io.StringIO('01\n0\r\n2\n'), output, annotate=True)
+        self.assertEqual(output.getvalue(), '01\t1\n0\t0\n2\t0\n')
+
+    def test_parallel_filter(self):
+        lines = ''.join(f'{value:b}\n' for value in range(3 * BATCH_SIZE * BATCHES_PER_JOB))
+        for annotate in [False, True]:
+            expected, output = io.StringIO(), io.StringIO()
+            filter_lines(self.compile('words'), io.StringIO(lines), expected, annotate)
+            filter_lines(self.compile('words'), io.StringIO(lines), output, annotate, jobs=2)
+            self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_undefined_language(self):
+        with self.assertRaises(RuntimeError):
+            self.compile('input')
+
+    def test_required_statements(self):
+        tree = self.parse()
+        identifiers = lambda name: [ statement.symbol.identifier for statement in required_statements(tree, name) ]
+        self.assertEqual(identifiers('bits'), ['bits'])
+        self.assertEqual(identifiers('words'), ['bits', 'pairs', 'words'])
+        self.assertEqual(identifiers('zero'), ['bits', 'pairs', 'zero'])
+
+    def compile(self, identifier):
+        return compile_language(self.parse(), identifier)
+
+    def parse(self):
+        with open(os.path.join(DATA_PATH, 'backend.lm')) as source:
+            tree = parse(tokenize(source))
+            typecheck_ast(tree)
+            return tree
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+from .helpers import ProgramRunner
+from loom import loomast, loomgen, loomparse, loomtoken
+from loomast import typecheck_ast
+from loomgen import BACKENDS, generate_program
+from loomparse import parse
+from loomtoken import tokenize
+import itertools
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestGenerate(ProgramRunner, unittest.TestCase):
+
+    def test_backends_agree(self):
+        self.agree(os.path.join(DATA_PATH, 'backend.lm'))
+
+    def test_operators_agree(self):
+        self.agree(os.path.join(DATA_PATH, 'operators.lm'))
+
+    def test_nfa_accepts(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'backend.lm')
+        program = self.generate(FILE_PATH, 'nfa')
+        self.assertEqual(self.execute(program, '11' + '01' * 2000), ['11' + '01' * 2000])
+        self.assertEqual(self.execute(program, '1' + '01' * 2000), None)
+
+    def test_dfa_tables(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'operators.lm')
+        program = self.generate(FILE_PATH, 'dfa')
+        self.assertNotIn('memo: not', program)
+        self.assertEqual(self.execute(program, '0' * 4001), ['0' * 4001])
+        self.assertEqual(self.execute(program, '0' * 4000), None)
+
+    def test_packed_strings(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'operators.lm')
+        program = self.generate(FILE_PATH, 'dfa', packed=True)
+        self.assertIn('string_0 = pack_string(string_0)', program)
+        self.assertEqual(self.execute(program, '0' * 4001), ['0' * 4001])
+        self.assertEqual(self.execute(program, '0' * 4000), None)
+
+    def test_streamed_input(self):
+        for backend, name in [('nfa', 'backend.lm'), ('dfa', 'operators.lm')]:
+            FILE_PATH = os.path.join(DATA_PATH, name)
+            for packed in [False, True]:
+                program = self.generate(FILE_PATH, backend, packed, stream=True)
+                self.assertIn(f'{backend}_stream(', program)
+                self.assertNotIn('input()', program)
+                for item in ['', '0', '01', '001', '100', '10101', '0' * 200001, '11' + '01' * 100000]:
+                    expected = self.execute(self.generate(FILE_PATH, 'dfa'), item)
+                    self.assertEqual(self.execute(program, item), expected, f'{backend}: {item}')
+                self.assertIsNone(self.execute(program, '0a0'))
+
+    def test_streamed_input_discarded(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'binary.lm')
+        with open(FILE_PATH) as source:
+            tree = parse(list(tokenize(source.read() + 'input ∈ strings* ?\n')))
+        program = generate_program(tree, 'dfa', stream=True)
+        self.assertIn('dfa_stream(dfa_1, None)', program)
+        self.assertEqual(self.execute(program, '0110'), [])
+
+    def test_lambda_long_input(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'backend.lm')
+        program = self.generate(FILE_PATH, 'lambda')
+        self.assertEqual(self.execute(program, '11' + '01' * 150), ['11' + '01' * 150])
+        self.assertEqual(self.execute(program, '1' + '01' * 150), None)
+
+    def test_common_subexpressions(self):
+        source = 'a := {0, 1} × {0, 1}*\nb := ({0, 1} × {0, 1}*) ∪ {0, 1}\ninput ∈ a ∩ b ?\ninput !\n'
+        tree = parse(list(tokenize(source)))
+        self.assertEqual(tree.statements[0].expression, tree.statements[1].expression.left)
+        self.assertEqual(hash(tree.statements[0].expression), hash(tree.statements[1].expression.left))
+        self.assertNotEqual(loomast.UnionExpression(tree.statements[0].expression, tree.statements[0].expression),
+                            loomast.IntersectExpression(tree.statements[0].expression, tree.statements[0].expression))
+        program = generate_program(tree, 'lambda')
+        self.assertEqual(program.count('_members = '), 1)
+        self.assertEqual(program.count('memoize("'), 1)
+        self.assertEqual(self.execute(program, '0110'), ['0110'])
+        self.assertEqual(self.execute(program, ''), None)
+
+    def test_trie_segmentation(self):
+        codewords = [ '0' + format(value, '08b') for value in range(256) ] + [ '1' + format(value, '010b') for value in range(1024) ]
+        source = f'code := {{{", ".join(codewords)}}}\ninput ∈ {{1}} × code* ?\ninput !\n'
+        tree = parse(list(tokenize(source)))
+        item = '1' + ''.join(codewords[(value * 7919) % len(codewords)] for value in range(2000))
+        for packed in [False, True]:
+            program = generate_program(tree, 'lambda', packed)
+            self.assertIn('trie_kleene(', program)
+            self.assertIn('trie_product(', program)
+            self.assertEqual(self.execute(program, item), [item])
+            self.assertEqual(self.execute(program, item[:-1]), None)
+
+    def test_long_concatenation(self):
+        bits = [ '01'[index % 3 % 2] for index in range(20000) ]
+        source = f'x := {" + ".join(bits)} ∈ {{0, 1}}*\nx !\n'
+        tree = parse(tokenize(source))
+        for packed in [False, True]:
+            program = generate_program(tree, 'lambda', packed)
+            self.assertEqual(self.execute(program, ''), [''.join(bits)])
+
+    def agree(self, file_path):
+        programs = { (backend, packed) : self.generate(file_path, backend, packed)
+                     for backend in BACKENDS for packed in (False, True) }
+        for length in range(8):
+            for bits in itertools.product('01', repeat=length):
+                item = ''.join(bits)
+                expected = self.execute(programs[('lambda', False)], item)
+                for options, program in programs.items():
+                    self.assertEqual(self.execute(program, item), expected, f'{options}: {item}')
+
+    def generate(self, file_path, backend, packed=False, stream=False):
+        with open(file_path) as source:
+            tree = parse(list(tokenize(source.read())))
+            typecheck_ast(tree)
+            return generate_program(tree, backend, packed, stream)
+
+if __name__ == '__main__':
+    unittest.main()
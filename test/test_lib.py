@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from loom import loomlib
+from loomlib import compile
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestLib(unittest.TestCase):
+
+    def test_languages(self):
+        environment = self.compile()
+        self.assertIn('0', environment['words'])
+        self.assertIn('1101', environment['words'])
+        self.assertNotIn('1', environment['words'])
+        self.assertNotIn('0a', environment['words'])
+        self.assertEqual(environment['pairs'].match_many(['01', '0', '']), [True, False, False])
+
+    def test_strings(self):
+        environment = self.compile({'input' : '011'})
+        self.assertEqual(environment.string('zero'), '00')
+        self.assertEqual(environment['input'], '011')
+        self.assertEqual(environment.output, ['011'])
+
+    def test_missing_input(self):
+        environment = self.compile()
+        self.assertEqual(environment.output, [])
+        with self.assertRaises(RuntimeError):
+            environment.string('input')
+
+    def test_rejected_input(self):
+        with self.assertRaises(RuntimeError):
+            self.compile({'input' : '1'})
+        with self.assertRaises(RuntimeError):
+            self.compile({'input' : '0a'})
+
+    def compile(self, inputs=None):
+        with open(os.path.join(DATA_PATH, 'backend.lm')) as source:
+            return compile(source, inputs)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+from loom import loom
+import io
+import unittest
+from unittest import mock
+
+class TestLoom(unittest.TestCase):
+
+    def test_arguments(self):
+        arguments = self.parse_arguments('--filter', 'words', '--jobs', '4')
+        self.assertEqual((arguments['filter'], arguments['jobs']), ('words', 4))
+
+    def test_invalid_arguments(self):
+        for argv in [['--jobs', '0'], ['--jobs', '-2'], ['--count', 'words', '--length', '-1'], ['--max-length', '-1']]:
+            with self.assertRaises(SystemExit):
+                self.parse_arguments(*argv)
+
+    def parse_arguments(self, *argv):
+        with mock.patch('sys.argv', ['loom.py', 'program.lm', *argv]), mock.patch('sys.stderr', io.StringIO()):
+            return loom.parse_arguments()
+
+if __name__ == '__main__':
+    unittest.main()
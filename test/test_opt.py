@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+from .helpers import ProgramRunner
+from loom import loomast, loomgen, loomopt, loomparse, loomtoken
+from loomast import KleeneExpression, ProductExpression, Set, String, typecheck_ast
+from loomgen import generate_program
+from loomopt import LengthAnalyser, Lengths, fold_constants
+from loomparse import parse
+from loomtoken import tokenize
+import itertools
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestOptimise(ProgramRunner, unittest.TestCase):
+
+    def test_fold_product(self):
+        tree = fold_constants(self.parse('bits := {0, 1}\nbytes := bits × bits × bits\n'))
+        expected = Set([ String(''.join(bits)) for bits in itertools.product('01', repeat=3) ])
+        self.assertEqual(tree.statements[1].expression, expected)
+
+    def test_fold_limit(self):
+        source = 'bits := {0, 1}\nbytes := bits × bits × bits\n'
+        tree = fold_constants(self.parse(source), 4)
+        self.assertEqual(type(tree.statements[1].expression), ProductExpression)
+        self.assertEqual(tree.statements[1].expression.right, Set([ String(bits) for bits in ['00', '01', '10', '11'] ]))
+        self.assertEqual(fold_constants(self.parse(source), 0), self.parse(source))
+
+    def test_fold_operators(self):
+        tree = fold_constants(self.parse('a := ({0, 1} ∪ {11}) - {1}\nb := {0}* ∩ ∅\nc := {ε}*\nd := {0}*\n'))
+        self.assertEqual([ statement.expression for statement in tree.statements[:3] ],
+                         [ Set([ String('0'), String('11') ]), Set([]), Set([ String('') ]) ])
+        self.assertEqual(type(tree.statements[3].expression), KleeneExpression)
+
+    def test_folded_program(self):
+        for name in ['backend.lm', 'operators.lm']:
+            with open(os.path.join(DATA_PATH, name)) as source:
+                tree = self.parse(source.read())
+            for backend in ['lambda', 'dfa']:
+                folded = generate_program(fold_constants(tree), backend)
+                program = generate_program(tree, backend)
+                for length in range(7):
+                    for bits in itertools.product('01', repeat=length):
+                        item = ''.join(bits)
+                        self.assertEqual(self.execute(folded, item), self.execute(program, item), f'{name}: {item}')
+
+    def test_lengths(self):
+        source = 'bits := {0, 1}\nbyte := bits × bits × bits × bits × bits × bits × bits × bits\n' \
+                 'mixed := {0, 111} ∪ {ε}\ninput ∈ (byte* × mixed) ∩ ¬{1} ?\n'
+        analyser = LengthAnalyser()
+        tree = self.parse(source)
+        analyser.visit(tree)
+        byte, mixed, input = [ statement.expression for statement in tree.statements[1:] ]
+        self.assertEqual(analyser.build(byte), Lengths(8, 8, 0))
+        self.assertEqual(analyser.build(byte.left), Lengths(1, 1, 0))
+        self.assertEqual(analyser.build(KleeneExpression(byte)), Lengths(0, None, 8))
+        self.assertEqual(analyser.build(mixed), Lengths(0, 3, 1))
+        self.assertEqual(analyser.build(input), Lengths(0, None, 1))
+        self.assertEqual(analyser.build(self.parse('a := {00} ∩ {111}\n').statements[0].expression), None)
+
+    def test_fixed_width_product(self):
+        with open(os.path.join(DATA_PATH, '..', '..', 'examples', 'ascii.loom')) as source:
+            program = generate_program(self.parse(source.read()), 'lambda')
+        item = '01001100' * 500
+        self.assertEqual(self.execute(program, item), ['01001100011011110110111101101101' + '00111010' + item])
+        self.assertEqual(self.execute(program, item + '0'), None)
+
+    def parse(self, source):
+        tree = parse(list(tokenize(source)))
+        typecheck_ast(tree)
+        return tree
+
+if __name__ == '__main__':
+    unittest.main()
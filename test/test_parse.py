@@ -3,7 +3,7 @@
 import loom
 from loom import loomast, loomtoken, loomparse
 from loomast import *
-from loomparse import parse
+from loomparse import parse, parse_statements
 from loomtoken import tokenize
 import os
 import unittest
@@ -34,6 +34,57 @@ class TestParse(unittest.TestCase):
         FILE_PATH = os.path.join(DATA_PATH, 'binary.lm')
         self.expect(EXPECTED, FILE_PATH)
 
+    def test_operators(self):
+        EXPECTED = Program([LanguageDefinition(Symbol('a'), IntersectExpression(                         \
+            ProductExpression(ComplementExpression(ComplementExpression(Set([String('0')]))),          \
+                              DifferenceExpression(UnionExpression(KleeneExpression(Set([String('1')])), \
+                                                                   Symbol('a')),                        \
+                                                   Symbol('b'))),                                       \
+            Symbol('c')))])
+        FILE_PATH = os.path.join(DATA_PATH, 'operators_parse.lm')
+        self.expect(EXPECTED, FILE_PATH)
+
+    def test_visitor_dispatch(self):
+        with open(os.path.join(DATA_PATH, 'operators.lm')) as source:
+            tree = parse(tokenize(source))
+        for statement in tree.statements:
+            self.assertFalse(hasattr(statement, '__dict__'))
+        self.assertEqual(ASTStringifier.methods[Set], ASTStringifier.visit_set)
+        self.assertTrue(ASTStringifier().visit(tree).startswith('(PROGRAM : (LANGUAGE-DEFINITION : (SYMBOL : bits)'))
+        with self.assertRaises(RuntimeError):
+            ASTStringifier().visit(tree.statements)
+
+    def test_deep_expressions(self):
+        bits = [ '01'[index % 3 % 2] for index in range(20000) ]
+        depth = 5000
+        source = f'l := {"(" * depth}{{0}}{" ∪ {1})" * depth}*\n' \
+                 f'x := {" + ".join(bits)} ∈ {"¬" * depth}l ∩ {" × ".join(["l"] * depth)}\n'
+        nested = Set([String('0')])
+        for _ in range(depth):
+            nested = UnionExpression(nested, Set([String('1')]))
+        string = String(bits[-1])
+        for bit in reversed(bits[:-1]):
+            string = ConcatenateExpression(String(bit), string)
+        complement = Symbol('l')
+        for _ in range(depth):
+            complement = ComplementExpression(complement)
+        product = Symbol('l')
+        for _ in range(depth - 1):
+            product = ProductExpression(Symbol('l'), product)
+        tree = parse(tokenize(source))
+        self.assertEqual(tree, Program([LanguageDefinition(Symbol('l'), KleeneExpression(nested)),
+                                        StringDefinition(Symbol('x'), string, IntersectExpression(complement, product))]))
+        typecheck_ast(tree)
+        self.assertEqual(ASTStringifier().visit(tree.statements[1].string_expression).count('(STRING : '), len(bits))
+
+    def test_streamed_statements(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'binary.lm')
+        with open(FILE_PATH, 'rb') as source:
+            statements = parse_statements(tokenize(source, 4))
+            self.assertEqual(next(statements), LanguageDefinition(Symbol('strings'), \
+                ProductExpression(Set([String('0'), String('1')]), Set([String('0'), String('1')]))))
+            self.assertLess(source.tell(), os.path.getsize(FILE_PATH))
+
     def expect(self, expected, file_path):
         with open(file_path) as source:
             tokens = list(tokenize(source.read()))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+from loom import loomserve
+from loomast import typecheck_ast
+from loomparse import parse
+from loomserve import MembershipServer, compile_languages
+from loomtoken import tokenize
+import asyncio
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestServe(unittest.TestCase):
+
+    def test_compile_languages(self):
+        self.assertEqual(sorted(self.languages()), ['bits', 'pairs', 'words'])
+
+    def test_queries(self):
+        answers = asyncio.run(self.query(b'words 011\nwords 0110\npairs\nmissing 0\nwords 2\nSTATS\n')).split('\n')
+        self.assertEqual(answers[:5], [ '1', '0', '0', 'ERROR Language "missing" not defined', 'ERROR Query string is not binary' ])
+        counts = [ line.split('\t')[:2] for line in answers[5:-2] ]
+        self.assertEqual(counts, [ ['bits', '0'], ['pairs', '1'], ['words', '2'] ])
+        self.assertEqual(answers[-2:], [ '', '' ])
+
+    def test_concurrent_queries(self):
+        async def scenario():
+            server = MembershipServer(self.languages(), batch_size=4)
+            server.start()
+            results = await asyncio.gather(*[ server.match('words', format(value, 'b')) for value in range(64) ])
+            server.stop()
+            return results
+        expected = [ self.languages()['words'].accepts(format(value, 'b')) for value in range(64) ]
+        self.assertEqual(asyncio.run(scenario()), expected)
+
+    def test_broken_connection(self):
+        class BrokenWriter:
+            def write(self, data):
+                pass
+            async def drain(self):
+                raise ConnectionResetError()
+            def close(self):
+                pass
+        async def scenario():
+            server = MembershipServer(self.languages(), batch_size=2)
+            server.start()
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'words 011\n' * 16)
+            try:
+                await asyncio.wait_for(server.handle(reader, BrokenWriter()), 5)
+            finally:
+                server.stop()
+        asyncio.run(scenario())
+
+    def test_undecodable_query(self):
+        answers = asyncio.run(self.query(b'words \xff\xfe\nwords 011\n')).split('\n')
+        self.assertEqual(answers, [ 'ERROR Query is not valid UTF-8', '1', '' ])
+
+    async def query(self, requests):
+        server = MembershipServer(self.languages())
+        server.start()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+        writer.write(requests)
+        writer.write_eof()
+        answers = (await reader.read()).decode()
+        writer.close()
+        listener.close()
+        server.stop()
+        return answers
+
+    def languages(self):
+        with open(os.path.join(DATA_PATH, 'backend.lm')) as source:
+            tree = parse(tokenize(source))
+            typecheck_ast(tree)
+            return compile_languages(tree)
+
+if __name__ == '__main__':
+    unittest.main()
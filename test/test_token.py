@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 from loom import loomtoken
-from loomtoken import TokenType, Symbol, Define, In, Union, Intersect, Product, Difference, Complement, Concatenate, LeftParenthesis, RightParenthesis, LeftBrace, RightBrace, EmptySet, Comma, String, tokenize
+from loomtoken import TokenType, Symbol, Define, Newline, In, Union, Intersect, Product, Difference, Complement, Concatenate, LeftParenthesis, RightParenthesis, LeftBrace, RightBrace, EmptySet, Comma, String, tokenize
+import io
+import mmap
 import os
 import unittest
 
@@ -55,6 +57,30 @@ class TestToken(unittest.TestCase):
         FILE_PATH = os.path.join(DATA_PATH, 'unspaced_tokens.lm')
         self.expect(EXPECTED, FILE_PATH)
 
+    def test_streamed_tokens(self):
+        for name in ['spaced_tokens.lm', 'unspaced_tokens.lm']:
+            FILE_PATH = os.path.join(DATA_PATH, name)
+            with open(FILE_PATH) as source:
+                expected = list(tokenize(source.read()))
+            for chunk_size in range(1, 8):
+                with open(FILE_PATH, 'rb') as source:
+                    self.assertEqual(list(tokenize(source, chunk_size)), expected)
+            with open(FILE_PATH, 'rb') as source:
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    self.assertEqual(list(tokenize(mapped, 2)), expected)
+
+    def test_streamed_long_string(self):
+        bits = '01' * (1 << 19)
+        source = io.BytesIO(f'long := {bits}\nshort := 1\n'.encode())
+        tokens = list(tokenize(source, 64))
+        self.assertEqual(tokens, [ Symbol('long'), Define(), String(bits), Newline(), Symbol('short'), Define(), String('1'), Newline() ])
+
+    def test_unknown_token(self):
+        FILE_PATH = os.path.join(DATA_PATH, 'unknown_token.lm')
+        with open(FILE_PATH) as source:
+            with self.assertRaisesRegex(RuntimeError, 'line 2 column 3'):
+                list(tokenize(source.read()))
+
     def expect(self, expected, file_path):
         with open(file_path) as source:
             for actual, expected in zip(tokenize(source.read()), expected):
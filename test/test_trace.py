@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+from loom import loomtrace
+from loomgen import generate_program
+from loomparse import parse
+from loomtoken import tokenize
+from loomtrace import NULL_SPAN, ChromeTrace, add_hook, count_nodes, remove_hook, span
+import json
+import loomtrace
+import os
+import tempfile
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestTrace(unittest.TestCase):
+
+    def test_disabled(self):
+        self.assertIs(span('parse'), NULL_SPAN)
+        with span('parse') as trace:
+            trace['tokens'] = 1
+
+    def test_hooks(self):
+        spans = []
+        add_hook(spans.append)
+        try:
+            with span('parse', source='backend.lm') as trace:
+                trace['tokens'] = 3
+            self.assertIs(span('statement', statement=True), NULL_SPAN)
+        finally:
+            remove_hook(spans.append)
+        self.assertEqual([ (s.name, s.args) for s in spans ], [ ('parse', { 'source' : 'backend.lm', 'tokens' : 3 }) ])
+        self.assertGreaterEqual(spans[0].wall, 0)
+
+    def test_chrome_trace(self):
+        with open(os.path.join(DATA_PATH, 'backend.lm')) as source:
+            tree = parse(tokenize(source))
+        self.assertEqual(count_nodes(tree), 32)
+        trace = ChromeTrace()
+        add_hook(trace)
+        loomtrace.detailed = True
+        try:
+            with span('generate'):
+                generate_program(tree)
+        finally:
+            loomtrace.detailed = False
+            remove_hook(trace)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            trace.write(path)
+            with open(path) as output:
+                events = json.load(output)['traceEvents']
+        self.assertEqual([ event['name'] for event in events ],
+                         [ 'LanguageDefinition' ] * 3 + [ 'InquireStatement', 'StringDefinition', 'ExclaimStatement', 'generate' ])
+        self.assertTrue(all(event['ph'] == 'X' and 'cpu_ms' in event['args'] for event in events))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+from loom import loomvector
+from loomautomaton import DFA, NFA
+from loomvector import match_array, match_packed
+import itertools
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class TestVector(unittest.TestCase):
+
+    def setUp(self):
+        pairs = NFA.kleene(NFA.from_strings(['00', '01', '10', '11']))
+        self.dfa = DFA.from_nfa(NFA.product(NFA.from_strings(['1']), pairs)).minimize()
+        self.strings = [ ''.join(bits) for length in range(12) for bits in itertools.product('01', repeat=length) ]
+
+    def test_match_array(self):
+        width = max(map(len, self.strings))
+        bits = numpy.zeros((len(self.strings), width), dtype=numpy.uint8)
+        for row, string in enumerate(self.strings):
+            bits[row, :len(string)] = [ int(bit) for bit in string ]
+        lengths = [ len(string) for string in self.strings ]
+        expected = [ self.dfa.accepts(string) for string in self.strings ]
+        self.assertEqual(match_array(self.dfa, bits, lengths).tolist(), expected)
+
+    def test_match_packed(self):
+        width = max(map(len, self.strings))
+        bits = numpy.zeros((len(self.strings), width), dtype=numpy.uint8)
+        for row, string in enumerate(self.strings):
+            bits[row, :len(string)] = [ int(bit) for bit in string ]
+        lengths = [ len(string) for string in self.strings ]
+        expected = [ self.dfa.accepts(string) for string in self.strings ]
+        self.assertEqual(match_packed(self.dfa, numpy.packbits(bits, axis=1), lengths).tolist(), expected)
+
+    def test_fixed_width(self):
+        bits = numpy.array([[1, 0, 1], [0, 1, 1], [1, 1, 1]], dtype=numpy.uint8)
+        self.assertEqual(match_array(self.dfa, bits).tolist(), [True, False, True])
+
+if __name__ == '__main__':
+    unittest.main()
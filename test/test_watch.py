@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+from .helpers import ProgramRunner
+from loom import loomwatch
+from loomast import typecheck_ast
+from loomgen import BACKENDS, generate_program
+from loomparse import parse
+from loomtoken import tokenize
+from loomwatch import IncrementalCompiler
+import itertools
+import os
+import unittest
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+class TestWatch(ProgramRunner, unittest.TestCase):
+
+    def test_matches_batch(self):
+        for name in ['backend.lm', 'operators.lm']:
+            source = self.read(name)
+            tree = parse(tokenize(source))
+            typecheck_ast(tree)
+            for backend, packed in itertools.product(BACKENDS, [False, True]):
+                expected = generate_program(tree, backend, packed)
+                actual = IncrementalCompiler(backend, packed).compile(source)
+                for length in range(6):
+                    for bits in itertools.product('01', repeat=length):
+                        item = ''.join(bits)
+                        self.assertEqual(self.execute(actual, item), self.execute(expected, item),
+                                         f'{name} {backend} {packed}: {item}')
+
+    def test_incremental_rebuild(self):
+        source = self.read('backend.lm')
+        compiler = IncrementalCompiler()
+        compiler.compile(source)
+        self.assertEqual((compiler.lexed, compiler.parsed, compiler.rebuilt), (6, 6, 6))
+        edited = source.replace('pairs := bits × bits', 'pairs := bits × bits ∪ {000}')
+        program = compiler.compile(edited)
+        self.assertEqual((compiler.lexed, compiler.parsed, compiler.rebuilt), (1, 1, 5))
+        self.assertEqual(self.execute(program, '1101000'), ['1101000'])
+        self.assertEqual(self.execute(program, '11010'), None)
+        compiler.compile('# comment\n' + edited)
+        self.assertEqual((compiler.lexed, compiler.parsed, compiler.rebuilt), (1, 0, 0))
+
+    def test_errors(self):
+        source = self.read('backend.lm')
+        compiler = IncrementalCompiler()
+        compiler.compile(source)
+        with self.assertRaises(RuntimeError):
+            compiler.compile('pairs := {0}\n' + source)
+        with self.assertRaises(RuntimeError):
+            compiler.compile(source.replace('bits := {0, 1}\n', ''))
+        compiler.compile(source)
+        self.assertEqual(compiler.rebuilt, 0)
+
+    def read(self, name):
+        with open(os.path.join(DATA_PATH, name)) as source:
+            return source.read()
+
+if __name__ == '__main__':
+    unittest.main()